@@ -0,0 +1,66 @@
+"""
+Calls per second through the Codec.decodemethod and
+Codec.encodemethod wrappers.
+
+Run from the repository root:
+
+  python -m benchmarks.codec_calls
+"""
+
+import timeit as _timeit_
+
+from si.codec import integer as _integer_
+from si.product import bs as _bs_
+from si.product import memory as _memory_
+from si.product.codec import sysdata as _sysdata_
+
+
+def _cases():
+  station = _bs_.BaseStation()
+  sysdata = station.sysdata
+  sysdata['SerialNumber'] = 123456
+  Int16ub = _integer_.Int16ub
+  EnumCodec = _sysdata_.productfamily.codec.subcodec
+  BoardVersion = _sysdata_.boardversion.codec
+  ProductFamily = _sysdata_.productfamily.codec
+  SysAddr = _memory_.SysAddr
+  whole_memory = station.memory.data
+  MaskedInt64ub = _integer_.Int64ub.classfactory(
+      'MaskedInt64ub',
+      mask=b'\xFF\x0F\x00\xFF\xF0\xFF\x00\xFF',
+  )
+  masked_idxs = range(0x20, 0x28)
+  return (
+    ('Int16ub.decode', lambda: Int16ub.decode(b'\x01\x02')),
+    ('Int16ub.encode', lambda: Int16ub.encode(258)),
+    ('EnumCodec.decode', lambda: EnumCodec.decode(b'\x98')),
+    ('EnumCodec.encode', lambda: EnumCodec.encode('Bsx8')),
+    ('BoardVersionCodec.decode',
+        lambda: BoardVersion.decode(b'\x15')),
+    ("sysdata['ProductFamily']",
+        lambda: sysdata['ProductFamily']),
+    ("sysdata['ProductFamily'] = ...",
+        lambda: sysdata.__setitem__('ProductFamily', 'Bsx8')),
+    ('masked Int64ub.decode',
+        lambda: MaskedInt64ub.decode(
+            whole_memory, idxs=masked_idxs)),
+    ('masked Int64ub.encode into memory',
+        lambda: MaskedInt64ub.encode(
+            2**63 - 3, data=whole_memory, idxs=masked_idxs)),
+    ('ProductFamilyCodec.decode (128 KiB)',
+        lambda: ProductFamily.decode(whole_memory, idxmap=SysAddr)),
+    ("sysdata['SerialNumber']",
+        lambda: sysdata['SerialNumber']),
+    ("sysdata['SerialNumber'] = ...",
+        lambda: sysdata.__setitem__('SerialNumber', 123456)),
+  )
+
+
+def main(number=100000):
+  for name, f in _cases():
+    t = min(_timeit_.repeat(f, number=number, repeat=3))
+    print(f'{name:<32} {number / t:>12,.0f} calls/s')
+
+
+if __name__ == '__main__':
+  main()
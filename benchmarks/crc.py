@@ -0,0 +1,79 @@
+"""
+Throughput of the table driven extended protocol CRC compared
+with the bit-by-bit reference implementation, on the payload of
+READ_CARDX_BLOCK responses (CMD, LEN, station number, block
+number and a 128 bytes card block).
+
+Run from the repository root:
+
+  python -m benchmarks.crc
+"""
+
+import os as _os_
+import timeit as _timeit_
+
+from si.protocol import extended as _extended_
+
+
+def crc_reference(data, *, crc_bitf=0x8000, crc_poly=0x8005):
+  # References:
+  # PCPROG5 (p. 5)
+  # Helper.cs 0917311 (#L681-L742)
+  if len(data) < 2:
+    num = 0
+  else:
+    num = 256 * data[0] + data[1]
+    if len(data) > 2:
+      i = 3
+      while i <= len(data) + 2:
+        if i < len(data):
+          num2 = 256 * data[i - 1] + data[i]
+          i += 1
+        else:
+          if i == len(data):
+            num2 = 256 * data[i - 1]
+          else:
+            num2 = 0
+          i += 2
+        for j in range(0, 16):
+          test = num & crc_bitf
+          num = num + num & 65535
+          if num2 & crc_bitf:
+            num = num + 1 & 65535
+          if test:
+            num = (num ^ crc_poly) & 65535
+          num2 += num2 & 65535
+        i += 1
+  return num.to_bytes(2, 'big')
+
+
+def main(number=2000):
+  blocks = [
+      b'\xEF\x83\x00\x01\x00' + _os_.urandom(128)
+      for _ in range(16)
+  ]
+  crc = _extended_.crc
+  for block in blocks:
+    assert crc(block) == crc_reference(block)
+
+  def incremental():
+    for block in blocks:
+      state = _extended_.CrcState()
+      for i in range(0, len(block), 16):
+        state.update(block[i:i+16])
+      state.digest()
+
+  cases = (
+    ('reference', lambda: [crc_reference(b) for b in blocks]),
+    ('crc()', lambda: [crc(b) for b in blocks]),
+    ('CrcState, 16 byte chunks', incremental),
+  )
+  size = sum(len(b) for b in blocks)
+  for name, f in cases:
+    t = min(_timeit_.repeat(f, number=number // 10, repeat=3))
+    rate = size * (number // 10) / t
+    print(f'{name:<28} {rate / 1e6:>8.2f} MB/s')
+
+
+if __name__ == '__main__':
+  main()
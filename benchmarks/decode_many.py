@@ -0,0 +1,63 @@
+"""
+Values per second when decoding many same-shaped records with a
+decode() loop versus a single Codec.decode_many() call (and
+RegularIntegerCodec.decode_array()).
+
+Run from the repository root:
+
+  python -m benchmarks.decode_many
+"""
+
+import os as _os_
+import timeit as _timeit_
+
+from si.codec import integer as _integer_
+from si.codec import record as _record_
+from si.product import ProductFamily as _ProductFamily_
+from si.product.codec import sysdata as _sysdata_
+
+
+def _cases(size):
+  random_data = _os_.urandom(size)
+  pfam_values = bytes(v.value for v in _ProductFamily_)
+  enum_data = (pfam_values * size)[:size]
+  EnumCodec = _sysdata_.productfamily.codec.subcodec
+  PunchRecord = _record_.RecordCodec.classfactory(
+    'PunchRecord',
+    fields=(
+      ('ptd', _integer_.Int8u),
+      ('cn', _integer_.Int8u),
+      ('pt', _integer_.Int16ub),
+    ),
+  )
+  return (
+    ('Int16ub', _integer_.Int16ub, random_data, 2, {}),
+    ('Int24ub', _integer_.Int24ub, random_data[:size // 3 * 3], 3,
+        {}),
+    ('Int32ub, stride 8', _integer_.Int32ub, random_data, 8,
+        {'stride': 8}),
+    ('EnumCodec', EnumCodec, enum_data, 1, {'size': 1}),
+    ('RecordCodec', PunchRecord, random_data, 4, {}),
+  )
+
+
+def main(size=65536, number=10):
+  for name, codec, data, stride, kwargs in _cases(size):
+    n = size // stride
+    recsize = kwargs.get('size') or codec.bitsize // 8
+    loop = lambda: [
+        codec.decode(data[i:i+recsize])
+        for i in range(0, n * stride, stride)
+    ]
+    many = lambda: codec.decode_many(data, **kwargs)
+    funcs = [('loop', loop), ('decode_many', many)]
+    if hasattr(codec, 'decode_array') and not kwargs:
+      funcs.append(('decode_array', lambda: codec.decode_array(data)))
+    for label, f in funcs:
+      t = min(_timeit_.repeat(f, number=number, repeat=3))
+      print(f'{name + " " + label:<36}'
+          f' {n * number / t:>14,.0f} values/s')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,48 @@
+"""
+Cost of building frequently sent instructions with make_obj and
+encode compared with looking them up in a FrameCache.
+
+Run from the repository root:
+
+  python -m benchmarks.framecache
+"""
+
+import timeit as _timeit_
+
+from si import protocol as _protocol_
+from si.protocol import extended as _extended_
+
+
+def main(number=20000):
+  raw = _extended_.ExtendedRawInstruction
+  cache = _protocol_.FrameCache()
+  requests = (
+    (_protocol_.ProtoChar.ACK, b''),
+    (_extended_.Cmd.GET_SYSDATA, b'\x00\x80'),
+    (_extended_.Cmd.GET_TIME, b''),
+    (_extended_.Cmd.BEEP, b'\x01'),
+  )
+
+  def encode():
+    for cmd, data in requests:
+      if isinstance(cmd, _protocol_.ProtoChar):
+        bytes((cmd.value,))
+      else:
+        raw.encode(raw.make_obj(cmd, data))
+
+  def cached():
+    for cmd, data in requests:
+      cache.get(cmd, data)
+
+  cases = (
+    ('make_obj + encode', encode),
+    ('FrameCache.get', cached),
+  )
+  for name, f in cases:
+    t = min(_timeit_.repeat(f, number=number, repeat=3))
+    print(f'{name:<20} {t / number / len(requests) * 1e6:>8.2f} us')
+  print(cache.stats())
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,76 @@
+"""
+End-to-end throughput of StationClient against VirtualStation
+simulators over pseudo terminals: sequential and pipelined
+GET_SYSDATA requests, and card insertion events of many stations
+merged by a StationManager.
+
+Run from the repository root:
+
+  python -m benchmarks.station_e2e
+"""
+
+import asyncio as _asyncio_
+import time as _time_
+
+from si.protocol import extended as _extended_
+from si.station import StationClient as _StationClient_
+from si.station import StationManager as _StationManager_
+from si.station import simulator as _simulator_
+
+
+async def _requests(pace, number):
+  station = _simulator_.VirtualStation(pace=pace)
+  client = await _StationClient_.open(await station.start())
+  request = (_extended_.Cmd.GET_SYSDATA, b'\x00\x80')
+  results = []
+  t = _time_.perf_counter()
+  for _ in range(number):
+    await client.request(*request)
+  results.append(('sequential', _time_.perf_counter() - t))
+  t = _time_.perf_counter()
+  await client.request_many([request] * number)
+  results.append(('pipelined', _time_.perf_counter() - t))
+  client.close()
+  station.close()
+  return results
+
+
+async def _events(nstations, ncards):
+  manager = _StationManager_()
+  stations = [
+      _simulator_.VirtualStation(pace=False)
+      for _ in range(nstations)
+  ]
+  for i, station in enumerate(stations, 1):
+    station.station.sysdata['SerialNumber'] = i
+    await manager.add(await station.start())
+  t = _time_.perf_counter()
+  for siid in range(2000001, 2000001 + ncards):
+    for station in stations:
+      station.insert_card(siid)
+  n = 0
+  async for _ in manager:
+    n += 1
+    if n == nstations * ncards:
+      break
+  t = _time_.perf_counter() - t
+  await manager.close()
+  for station in stations:
+    station.close()
+  return t
+
+
+def main(number=200, nstations=40, ncards=50):
+  for pace in (False, True):
+    results = _asyncio_.run(_requests(pace, number))
+    for name, t in results:
+      line = ('38400 baud' if pace else 'unpaced')
+      print(f'GET_SYSDATA {name:<10} {line:<10}'
+          f' {number / t:>8.0f} req/s')
+  t = _asyncio_.run(_events(nstations, ncards))
+  print(f'card events, {nstations} stations'
+      f'{nstations * ncards / t:>14.0f} events/s')
+
+
+if __name__ == '__main__':
+  main()
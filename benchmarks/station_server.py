@@ -0,0 +1,93 @@
+"""
+Fan-out throughput of StationServer: punch records published to
+reading subscribers of both formats over Unix sockets, with and
+without a subscriber that never reads.
+
+Run from the repository root:
+
+  python -m benchmarks.station_server
+"""
+
+import asyncio as _asyncio_
+import os as _os_
+import socket as _socket_
+import tempfile as _tempfile_
+import time as _time_
+
+from si.protocol import extended as _extended_
+from si.station import StationEvent as _StationEvent_
+from si.station import server as _server_
+
+
+async def _drain(reader, size):
+  n = 0
+  while n < size:
+    try:
+      data = await _asyncio_.wait_for(reader.read(1 << 16), 1.0)
+    except _asyncio_.TimeoutError:
+      break
+    if not data:
+      break
+    n += len(data)
+
+
+async def _fanout(nsubscribers, nevents, stalled):
+  server = _server_.StationServer()
+  path = _os_.path.join(_tempfile_.mkdtemp(), 'server.sock')
+  await server.listen_unix(path, format='raw')
+  await server.listen_unix(path + '.jsonl', format='jsonl')
+  raw = _extended_.ExtendedRawInstruction
+  frame = raw.make_obj(_extended_.Cmd.PUNCH_TRIGGER,
+      bytes.fromhex('0001001e84810c5912ff000100'))
+  event = _StationEvent_(1, frame)
+  sizes = {
+      'raw': len(_server_.encode_raw(event)),
+      'jsonl': len(_server_.encode_jsonl(event, 0.0)),
+  }
+  readers = []
+  for i in range(nsubscribers):
+    format = ('raw', 'jsonl')[i % 2]
+    reader, writer = await _asyncio_.open_unix_connection(
+        path + ('' if format == 'raw' else '.jsonl')
+    )
+    readers.append((reader, writer, sizes[format] * nevents))
+  sock = None
+  if stalled:
+    sock = _socket_.socket(_socket_.AF_UNIX)
+    sock.connect(path)
+  while len(server.subscribers) < nsubscribers + stalled:
+    await _asyncio_.sleep(0.01)
+  drains = [
+      _asyncio_.ensure_future(_drain(reader, size))
+      for reader, _, size in readers
+  ]
+  t = _time_.perf_counter()
+  for i in range(nevents):
+    server.publish(event, 0.0)
+    if i % 16 == 0:
+      await _asyncio_.sleep(0)
+  await _asyncio_.gather(*drains)
+  t = _time_.perf_counter() - t
+  dropped = [s.dropped for s in server.subscribers]
+  for _, writer, _ in readers:
+    writer.close()
+  if sock is not None:
+    sock.close()
+  await server.close()
+  return t, dropped
+
+
+def main(nsubscribers=8, nevents=20000):
+  for stalled in (False, True):
+    t, dropped = _asyncio_.run(
+        _fanout(nsubscribers, nevents, stalled)
+    )
+    name = f'{nsubscribers} subscribers' + (
+        ' + 1 stalled' if stalled else ''
+    )
+    print(f'{name:<26} {nevents / t:>8.0f} events/s'
+        f' dropped {sorted(dropped, reverse=True)}')
+
+
+if __name__ == '__main__':
+  main()
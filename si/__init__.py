@@ -20,3 +20,7 @@ from . import srr
 from . import codec
 from . import protocol
 from . import product
+
+# si.station is at the bottom of the hierarchy but it is not
+# imported here as it needs termios and asyncio:
+#   import si.station
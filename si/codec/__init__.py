@@ -4,6 +4,7 @@ __all__ = [
     'enum',
     'integer',
     'raw',
+    'record',
     'string',
     'time',
     ]
@@ -18,6 +19,7 @@ from . import constant
 from . import enum
 from . import integer
 from . import raw
+from . import record
 from . import string
 from . import time
 
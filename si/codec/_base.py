@@ -1,6 +1,7 @@
 import collections as _collections_
 import functools as _functools_
 import inspect as _inspect_
+import struct as _struct_
 
 from si.utils.funcdeco import doublewrap as _doublewrap_
 
@@ -19,119 +20,188 @@ MaskedIndexedData = _collections_.namedtuple(
     'MaskedIndexedData',
     ('data', 'idxs', 'mask'),
 )
+_DATA_TUPLES = (IndexedData, MaskedData, MaskedIndexedData)
 
 
-def _ensure_nice_args(
-      argspec, args, kwargs,
-      passargs, passdict,
-  ):
-  missing_args = [
-      a for a in argspec.args
-      if a not in ('cls', 'self') and a not in kwargs
-  ]
-  missing_args = missing_args[len(args):]
-  if missing_args:
-    args = list(args)
-  for arg in missing_args:
-    if arg not in passargs:
-      continue
-    args.append(passargs[arg])
-    passdict[arg] = False
-  for arg in (arg for arg in passdict if passdict[arg]):
-    kwargs[arg] = passargs[arg]
-  return args, kwargs
+def _callplan(m, passflags):
+  # Computed once at decoration time: the argument names of m
+  # and those names of passflags which the wrapper might need
+  # to pass, either positionally or as keywords.
+  argspec = _inspect_.getfullargspec(m)
+  names = tuple(
+      a for a in argspec.args if a not in ('cls', 'self')
+  )
+  positional = tuple(
+      (a, i, passflags[a]) for i, a in enumerate(names)
+      if a in passflags
+  )
+  keyword = tuple(
+      a for a, flag in passflags.items()
+      if flag and a not in names
+  )
+  if positional or keyword:
+    return names, positional, keyword
+#keep _inspect_
+
+
+def _passargs(plan, args, kwargs, passargs):
+  # Positional arguments of m named in passargs get appended to
+  # args unless the caller has given enough positional arguments
+  # to cover them; in that case they are passed as keywords if
+  # flagged.
+  names, positional, keyword = plan
+  if positional:
+    extra, extra_kw = [], []
+    for name, i, flag in positional:
+      if kwargs:
+        i -= sum(1 for a in names[:i] if a in kwargs)
+      if len(args) <= i:
+        extra.append(passargs[name])
+      elif flag:
+        extra_kw.append(name)
+    args = (*args, *extra)
+    for name in extra_kw:
+      kwargs[name] = passargs[name]
+  for name in keyword:
+    kwargs[name] = passargs[name]
+  return args
+
+
+def _maskbytes(mask):
+  if mask is None:
+    return None
+  elif isinstance(mask, int):
+    return bytes((mask,))
+  else:
+    return bytes(mask)
+
+
+def _span(idxs, len_):
+  # returns the slice equivalent to idxs if they are contiguous
+  if isinstance(idxs, range):
+    if idxs.step == 1:
+      return slice(idxs.start, idxs.stop)
+  elif len_ and tuple(idxs) == tuple(
+      range(idxs[0], idxs[0] + len_)):
+    return slice(idxs[0], idxs[0] + len_)
+
+
+def _gather(data, idxs, span):
+  if span is None:
+    return bytes(map(data.__getitem__, idxs))
+  else:
+    return bytes(data[span])
+
+
+def _and(data, mask):
+  # masks the whole buffer in one step
+  return (
+      int.from_bytes(data, 'big') & int.from_bytes(mask, 'big')
+  ).to_bytes(len(mask), 'big')
+
+
+def _merge(data, enc_data, mask):
+  # bits of enc_data where mask is set, bits of data elsewhere
+  mask_i = int.from_bytes(mask, 'big')
+  return (
+      (int.from_bytes(data, 'big') & ~mask_i)
+      | (int.from_bytes(enc_data, 'big') & mask_i)
+  ).to_bytes(len(mask), 'big')
+
+
+def _readonly(data):
+  # bytes-like objects get passed without copying; anything
+  # else (e.g. lists of integers) is still copied
+  if isinstance(data, bytes):
+    return data
+  elif isinstance(data, memoryview):
+    return (data if data.readonly else data.toreadonly())
+  elif isinstance(data, bytearray):
+    return memoryview(data).toreadonly()
+  else:
+    return bytearray(data)
+
 
 @_doublewrap_
-def _decodemethod(m, *, pass_idxs=False):
-  argspec = _inspect_.getfullargspec(m)
+def _decodemethod(m, *, pass_idxs=False, readonly=False):
+  # With readonly=True the decoded method declares that it does
+  # not modify its data argument and accepts any bytes-like
+  # object. In that case unmasked input is passed through as a
+  # read-only view instead of being copied into a bytearray.
+  plan = _callplan(m, {'idxs': pass_idxs})
   @_functools_.wraps(m)
   def wrapped(cls, data, *args, idxs=None, **kwargs):
-    mask = (cls.mask if hasattr(cls, 'mask') else None)
-    passargs = {'idxs': idxs}
-    passdict = {'idxs': pass_idxs}
-    args, kwargs = _ensure_nice_args(
-        argspec, args, kwargs, passargs, passdict
-    )
-    if mask is None or idxs is None:
-      data_ = bytearray(data)
+    if plan:
+      args = _passargs(plan, args, kwargs, {'idxs': idxs})
+    mask = cls._mask
+    if mask is None:
+      if readonly:
+        data_ = _readonly(data)
+      else:
+        data_ = bytearray(data)
     else:
-      data_ = bytearray(data[i] for i in idxs)
-    if mask is not None:
-      len_ = len(data_)
-      if isinstance(mask, int):
-        mask = (mask,)
-      assert len(mask) == len_
-      for i, b in enumerate(data_):
-        mask_v = mask[i]
-        data_[i] = b & mask_v
-    obj = m(cls, data_, *args, **kwargs)
-    return obj
+      if idxs is None:
+        data_ = bytes(data)
+      else:
+        data_ = _gather(data, idxs, _span(idxs, len(idxs)))
+      assert len(mask) == len(data_)
+      data_ = bytearray(_and(data_, mask))
+    return m(cls, data_, *args, **kwargs)
   return wrapped
 #keep _functools_
 
 
 @_doublewrap_
 def _encodemethod(m, *, pass_data=False, pass_idxs=False):
-  argspec = _inspect_.getfullargspec(m)
+  plan = _callplan(m, {'data': pass_data, 'idxs': pass_idxs})
   @_functools_.wraps(m)
   def wrapped(cls, *args, data=None, idxs=None,
         **kwargs):
-    pass_data_, pass_idxs_ = pass_data, pass_idxs
-    mask = (cls.mask if hasattr(cls, 'mask') else None)
-    passargs = {'data': data, 'idxs': idxs}
-    passdict = {'data': pass_data, 'idxs': pass_idxs}
-    args, kwargs = _ensure_nice_args(
-        argspec, args, kwargs, passargs, passdict
-    )
+    if plan:
+      args = _passargs(
+          plan, args, kwargs, {'data': data, 'idxs': idxs}
+      )
+    mask = cls._mask
     m_result = m(cls, *args, **kwargs)
-    if hasattr(m_result, 'data'):
+    if isinstance(m_result, _DATA_TUPLES):
       enc_data = m_result.data
+      if hasattr(m_result, 'mask'):
+        mask = _maskbytes(m_result.mask)
+      if hasattr(m_result, 'idxs'):
+        idxs = m_result.idxs
     else:
       enc_data = m_result
-    if hasattr(m_result, 'mask'):
-      mask = m_result.mask
-    if hasattr(m_result, 'idxs'):
-      idxs = m_result.idxs
-    if mask is None and data is None:
+    if data is None:
+      if mask is not None:
+        assert len(mask) == len(
+            enc_data if idxs is None else idxs)
       return enc_data
     if idxs is None:
-      idxs_ = range(len(enc_data))
+      idxs = range(len(enc_data))
+    len_ = len(idxs)
+    span = _span(idxs, len_)
+    if mask is None:
+      new_data = enc_data
     else:
-      idxs_ = idxs
-    len_ = len(idxs_)
-    if mask is not None:
-      if isinstance(mask, int):
-        mask = (mask,)
       assert len(mask) == len_
-    if data is None:
-      data_ = bytearray(len_)
+      new_data = _merge(_gather(data, idxs, span), enc_data, mask)
+    if span is None:
+      for dat_i, b in zip(idxs, new_data):
+        data[dat_i] = b
     else:
-      data_ = data
-    for enc_i, dat_i in enumerate(idxs_):
-      if mask is None:
-        data_[dat_i] = enc_data[enc_i]
-      else:
-        mask_v = mask[enc_i]
-        if not mask_v:
-          continue
-        elif mask_v == 255:
-          data_[dat_i] = enc_data[enc_i]
-        else:
-          inv_mask_v = 255 - mask_v
-          masked_enc_data = enc_data[enc_i] & mask_v
-          if data is None:
-            data_[dat_i] = masked_enc_data
-          else:
-            masked_data = data[dat_i] & inv_mask_v
-            data_[dat_i] = masked_data + masked_enc_data
+      data[span] = new_data
     return enc_data
   return wrapped
-#keep _inspect_
+#keep _functools_
 
 
 class Codec:
 
   bitsize = ...
+  mask = None
+
+  # computed from mask at class creation; see __init_subclass__
+  _mask = None
 
   decodemethod = _decodemethod
   encodemethod = _encodemethod
@@ -152,6 +222,105 @@ class Codec:
         'subclasses decorated with @encodemethod'
       )
 
+  def __init_subclass__(cls, **kwargs):
+    super().__init_subclass__(**kwargs)
+    cls._mask = _maskbytes(cls.mask)
+
+  @classmethod
+  def encode_into(cls, buffer, offset, *args):
+    """
+    Encode into the writable buffer at offset and return the
+    offset following the written data.
+
+    Class level masks are honoured; data masked dynamically by
+    the encodemethod are not, use encode(..., data=buffer)
+    for such codecs.
+    """
+    enc_data = cls.encode(*args)
+    end = offset + len(enc_data)
+    if cls._mask is None:
+      buffer[offset:end] = enc_data
+    else:
+      buffer[offset:end] = _merge(
+          buffer[offset:end], enc_data, cls._mask
+      )
+    return end
+
+  @classmethod
+  def _structitem(cls):
+    # Codecs which decode a single struct item return a
+    # (byteorder, format, converter) tuple here, so that record
+    # codecs can fuse them. Byteorder is None if irrelevant and
+    # converter is None if the unpacked item is the result.
+    return None
+
+  @classmethod
+  def decode_many(cls, data, stride=None, *, offsets=None,
+      size=None):
+    """
+    Decode equally sized records of the data buffer and return
+    the decoded objects in a list.
+
+    Records are size bytes long (bitsize // 8 by default) and
+    start either at the given offsets or at every stride bytes
+    (size by default) from the beginning of data. An incomplete
+    record at the end of data is ignored.
+
+    Codecs of a single struct item (see _structitem()) are
+    unpacked with one struct.Struct, the others decoded one by
+    one.
+    """
+    size, offsets = cls._records(data, stride, offsets, size)
+    item = cls._structitem()
+    if item is not None:
+      byteorder, fmt, converter = item
+      s = _struct_.Struct(
+          ('<' if byteorder == 'little' else '>') + fmt
+      )
+      if s.size == size:
+        values = [v for v, in cls._unpack(s, data, offsets)]
+        if converter is None:
+          return values
+        return list(map(converter, values))
+    view = memoryview(data)
+    decode = cls.decode
+    return [decode(view[o:o+size]) for o in offsets]
+  #keep _struct_
+
+  @staticmethod
+  def _contiguous(data, offsets, size):
+    # Return the view of data of the records at offsets if they
+    # follow each other, otherwise None.
+    if isinstance(offsets, range) and offsets.step == size:
+      start = offsets.start
+      return memoryview(data)[start:start + len(offsets) * size]
+    return None
+
+  @classmethod
+  def _unpack(cls, s, data, offsets):
+    # Iterate the tuples unpacked with the struct.Struct s from
+    # the records at offsets; in a single pass if contiguous.
+    view = cls._contiguous(data, offsets, s.size)
+    if view is not None:
+      return s.iter_unpack(view)
+    view = memoryview(data)
+    unpack_from = s.unpack_from
+    return (unpack_from(view, o) for o in offsets)
+
+  @classmethod
+  def _records(cls, data, stride, offsets, size):
+    if size is None:
+      if not isinstance(cls.bitsize, int):
+        raise TypeError(f'{cls.__name__} has no fixed size; '
+            'size should be given')
+      size = cls.bitsize // 8
+    if offsets is None:
+      stride = (size if stride is None else stride)
+      offsets = range(0, len(data) - size + 1, stride)
+    elif stride is not None:
+      raise TypeError('either stride or offsets should be given')
+    return size, offsets
+
   @classmethod
   def classfactory(cls, name, *, bases=None, **dict_):
     bases = ((cls,) if bases is None else bases)
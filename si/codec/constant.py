@@ -17,5 +17,11 @@ class ConstantCodec(_Codec_):
   def encode(cls):
     return cls.data
 
+  @classmethod
+  def encode_into(cls, buffer, offset):
+    end = offset + len(cls.data)
+    buffer[offset:end] = cls.data
+    return end
+
 
 del _Codec_
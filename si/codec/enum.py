@@ -9,10 +9,10 @@ class EnumCodec(_Codec_):
   subcodec = None
 
   @classmethod
-  @_Codec_.decodemethod
+  @_Codec_.decodemethod(readonly=True)
   def decode(cls, data):
     if cls.subcodec is None:
-      return cls.enum(data)
+      return cls.enum(bytes(data))
     else:
       return cls.enum(cls.subcodec.decode(data))
 
@@ -26,5 +26,37 @@ class EnumCodec(_Codec_):
       return cls.subcodec.encode(obj.value)
   #keep _enumhelper_
 
+  @classmethod
+  def encode_into(cls, buffer, offset, obj):
+    if cls._mask is not None:
+      return super().encode_into(buffer, offset, obj)
+    obj = _enumhelper_.get(cls.enum, obj)
+    if cls.subcodec is None:
+      end = offset + len(obj.value)
+      buffer[offset:end] = obj.value
+      return end
+    else:
+      return cls.subcodec.encode_into(buffer, offset, obj.value)
+  #keep _enumhelper_
+
+  @classmethod
+  def _structitem(cls):
+    if (cls._mask is not None
+        or cls.decode.__func__ is not EnumCodec.decode.__func__):
+      return None
+    enum = cls.enum
+    if cls.subcodec is None:
+      if not isinstance(cls.bitsize, int):
+        return None
+      return None, f'{cls.bitsize // 8}s', enum
+    item = cls.subcodec._structitem()
+    if item is None:
+      return None
+    byteorder, fmt, converter = item
+    if converter is None:
+      return byteorder, fmt, enum
+    else:
+      return byteorder, fmt, lambda v: enum(converter(v))
+
 
 del _Codec_
@@ -1,16 +1,44 @@
+import array as _array_
 import math as _math_
 import struct as _struct_
 import sys as _sys_
 
+try:
+  import numpy as _numpy_
+except ImportError:
+  _numpy_ = None
+
 from si.codec import Codec as _Codec_
 
 
+def _arraytypecode(itemsize, signed):
+  # array module typecodes have platform dependent sizes
+  for typecode in ('bhilq' if signed else 'BHILQ'):
+    if _array_.array(typecode).itemsize == itemsize:
+      return typecode
+#keep _array_
+
+
 class RegularIntegerCodec(_Codec_):
 
   bitsize = NotImplemented
   signed = NotImplemented
   byteorder = _sys_.byteorder
 
+  # computed at class creation; see __init_subclass__
+  _struct = None
+  _arraytypecode = None
+
+  def __init_subclass__(cls, **kwargs):
+    super().__init_subclass__(**kwargs)
+    if (cls.bitsize is not NotImplemented
+        and cls.signed is not NotImplemented):
+      cls._struct = _struct_.Struct(cls.typecode())
+      cls._arraytypecode = _arraytypecode(
+          cls._struct.size, cls.signed
+      )
+  #keep _struct_
+
   @classmethod
   def typecode(cls):
     first_char = {'little': '<', 'big': '>'}[cls.byteorder]
@@ -21,16 +49,277 @@ class RegularIntegerCodec(_Codec_):
   #keep _math_
 
   @classmethod
-  @_Codec_.decodemethod
+  @_Codec_.decodemethod(readonly=True)
   def decode(cls, data):
-    return _struct_.unpack(cls.typecode(), data)[0]
-  #keep _struct_
+    return cls._struct.unpack(data)[0]
 
   @classmethod
   @_Codec_.encodemethod
   def encode(cls, obj):
-    return _struct_.pack(cls.typecode(), obj)
-  #keep _struct_
+    return cls._struct.pack(obj)
+
+  @classmethod
+  def encode_into(cls, buffer, offset, obj):
+    if cls._mask is not None:
+      return super().encode_into(buffer, offset, obj)
+    cls._struct.pack_into(buffer, offset, obj)
+    return offset + cls._struct.size
+
+  @classmethod
+  def _structitem(cls):
+    if (cls._mask is not None
+        or cls.decode.__func__
+        is not RegularIntegerCodec.decode.__func__):
+      return None
+    byteorder = (cls.byteorder if cls.bitsize > 8 else None)
+    return byteorder, cls._struct.format[1:], None
+
+  @classmethod
+  def numpy_dtype(cls):
+    "Return the equivalent NumPy dtype; requires NumPy."
+    if _numpy_ is None:
+      raise ImportError('NumPy is not available')
+    first_char = {'little': '<', 'big': '>'}[cls.byteorder]
+    kind = ('i' if cls.signed else 'u')
+    return _numpy_.dtype(f'{first_char}{kind}{cls.bitsize // 8}')
+  #keep _numpy_
+
+  @classmethod
+  def decode_array(cls, data, *, numpy=False):
+    """
+    Decode the whole data buffer of consecutive integers in one
+    step and return them as an array.array of native byte
+    order, or as a NumPy array if numpy is True.
+
+    The length of data should be a multiple of the size of the
+    integers.
+    """
+    if numpy:
+      dtype = cls.numpy_dtype()
+      if cls._mask is not None:
+        return _numpy_.array(cls.decode_many(data), dtype=dtype)
+      return _numpy_.frombuffer(data, dtype=dtype)
+    if cls._mask is not None:
+      return _array_.array(
+          cls._arraytypecode, cls.decode_many(data)
+      )
+    arr = _array_.array(cls._arraytypecode)
+    arr.frombytes(data)
+    if cls.byteorder != _sys_.byteorder and arr.itemsize > 1:
+      arr.byteswap()
+    return arr
+  #keep _array_
+  #keep _numpy_
+  #keep _sys_
+
+  @classmethod
+  def encode_array(cls, values):
+    """
+    Encode the integers of values (an array.array, a NumPy
+    array or any iterable) in one step and return the bytes.
+    """
+    if (_numpy_ is not None
+        and isinstance(values, _numpy_.ndarray)):
+      dtype = cls.numpy_dtype()
+      return values.astype(dtype, copy=False).tobytes()
+    if not (isinstance(values, _array_.array)
+        and values.typecode == cls._arraytypecode):
+      values = _array_.array(cls._arraytypecode, values)
+    if cls.byteorder != _sys_.byteorder and values.itemsize > 1:
+      values = _array_.array(values.typecode, values)
+      values.byteswap()
+    return values.tobytes()
+  #keep _array_
+  #keep _numpy_
+  #keep _sys_
+
+
+# maps most significant bytes to the sign extension byte
+_SIGNFILL = bytes((255 if b & 128 else 0) for b in range(256))
+
+
+class IrregularIntegerCodec(_Codec_):
+  """
+  Integer codec of any whole number of bytes (e.g. 24 bits)
+  based on int.from_bytes() and int.to_bytes().
+
+  Batch methods spread the integers to the next regular width
+  with a few whole-buffer slice operations and use the
+  matching RegularIntegerCodec (widecodec) for the rest.
+  Integers wider than 8 bytes have no widecodec; their batch
+  methods convert them one by one.
+
+  >>> Int24ub.decode(b'\\x01\\x02\\x03')
+  66051
+  >>> Int24sl.decode_many(b'\\xFF\\xFF\\xFF\\x01\\x00\\x00')
+  [-1, 1]
+  >>> Int72ub = IrregularIntegerCodec.classfactory('Int72ub',
+  ...     bitsize=72, signed=False, byteorder='big')
+  >>> Int72ub.decode_array(Int72ub.encode_array([1, 1 << 64]))
+  [1, 18446744073709551616]
+  """
+
+  bitsize = NotImplemented
+  signed = NotImplemented
+  byteorder = _sys_.byteorder
+
+  # computed at class creation; see __init_subclass__
+  widecodec = None
+
+  def __init_subclass__(cls, **kwargs):
+    super().__init_subclass__(**kwargs)
+    if (cls.bitsize is not NotImplemented
+        and cls.signed is not NotImplemented):
+      size = cls.bitsize // 8
+      assert size * 8 == cls.bitsize
+      widesize = min((s for s in (1, 2, 4, 8) if size <= s),
+          default=None)
+      if widesize:
+        cls.widecodec = RegularIntegerCodec.classfactory(
+            f'{cls.__name__}Wide',
+            bitsize=widesize * 8,
+            signed=cls.signed,
+            byteorder=cls.byteorder,
+        )
+
+  @classmethod
+  @_Codec_.decodemethod(readonly=True)
+  def decode(cls, data):
+    return int.from_bytes(data, cls.byteorder, signed=cls.signed)
+
+  @classmethod
+  @_Codec_.encodemethod
+  def encode(cls, obj):
+    return obj.to_bytes(
+        cls.bitsize // 8, cls.byteorder, signed=cls.signed
+    )
+
+  @classmethod
+  def encode_into(cls, buffer, offset, obj):
+    if cls._mask is not None:
+      return super().encode_into(buffer, offset, obj)
+    size = cls.bitsize // 8
+    buffer[offset:offset+size] = obj.to_bytes(
+        size, cls.byteorder, signed=cls.signed
+    )
+    return offset + size
+
+  @classmethod
+  def _lanes(cls):
+    # offsets of the integer bytes within the wide integers
+    size = cls.bitsize // 8
+    pad = cls.widecodec.bitsize // 8 - size
+    if cls.byteorder == 'big':
+      return range(pad, pad + size), range(pad), 0
+    else:
+      return range(size), range(size, size + pad), size - 1
+
+  @classmethod
+  def _check_length(cls, data):
+    size = cls.bitsize // 8
+    if len(data) % size:
+      raise ValueError('data length is not a multiple of '
+          f'{size}')
+
+  @classmethod
+  def widen(cls, data):
+    """
+    Return a bytearray of the integers of data spread to the
+    size of widecodec.
+    """
+    if cls.widecodec is None:
+      raise TypeError(f'{cls.__name__} has no widecodec')
+    size = cls.bitsize // 8
+    widesize = cls.widecodec.bitsize // 8
+    cls._check_length(data)
+    data = bytes(data)
+    wide = bytearray(len(data) // size * widesize)
+    lanes, padlanes, msblane = cls._lanes()
+    for i, lane in enumerate(lanes):
+      wide[lane::widesize] = data[i::size]
+    if cls.signed and padlanes:
+      fill = data[msblane::size].translate(_SIGNFILL)
+      for lane in padlanes:
+        wide[lane::widesize] = fill
+    return wide
+  #keep _SIGNFILL
+
+  @classmethod
+  def narrow(cls, wide):
+    "Reverse of widen(); no range checks are made."
+    if cls.widecodec is None:
+      raise TypeError(f'{cls.__name__} has no widecodec')
+    size = cls.bitsize // 8
+    widesize = cls.widecodec.bitsize // 8
+    wide = bytes(wide)
+    data = bytearray(len(wide) // widesize * size)
+    lanes, _, _ = cls._lanes()
+    for i, lane in enumerate(lanes):
+      data[i::size] = wide[lane::widesize]
+    return bytes(data)
+
+  @classmethod
+  def decode_many(cls, data, stride=None, *, offsets=None,
+      size=None):
+    size_ = cls.bitsize // 8
+    if cls._mask is not None or size not in (None, size_):
+      return super().decode_many(data, stride,
+          offsets=offsets, size=size)
+    size, offsets = cls._records(data, stride, offsets, size_)
+    if cls.widecodec is not None:
+      view = cls._contiguous(data, offsets, size)
+      if view is not None:
+        return cls.widecodec.decode_many(cls.widen(view))
+    view = memoryview(data)
+    from_bytes = int.from_bytes
+    byteorder, signed = cls.byteorder, cls.signed
+    return [
+        from_bytes(view[o:o+size], byteorder, signed=signed)
+        for o in offsets
+    ]
+
+  @classmethod
+  def decode_array(cls, data, *, numpy=False):
+    """
+    Decode the whole data buffer of consecutive integers and
+    return them as an array of widecodec integers; see
+    RegularIntegerCodec.decode_array(). Without widecodec a list
+    of ints is returned, or a NumPy array of object dtype.
+    """
+    if cls.widecodec is None:
+      cls._check_length(data)
+      values = cls.decode_many(data)
+      if numpy:
+        if _numpy_ is None:
+          raise ImportError('NumPy is not available')
+        return _numpy_.array(values, dtype=object)
+      return values
+    if cls._mask is not None:
+      return cls.widecodec.decode_array(
+          cls.widecodec.encode_array(cls.decode_many(data)),
+          numpy=numpy,
+      )
+    return cls.widecodec.decode_array(
+        cls.widen(data), numpy=numpy
+    )
+
+  @classmethod
+  def encode_array(cls, values):
+    "Encode the integers of values in one step."
+    if cls.widecodec is None:
+      size = cls.bitsize // 8
+      byteorder, signed = cls.byteorder, cls.signed
+      return b''.join(
+          int(v).to_bytes(size, byteorder, signed=signed)
+          for v in values
+      )
+    if not len(values):
+      return b''
+    bits = cls.bitsize - cls.signed
+    low = (-(1 << bits) if cls.signed else 0)
+    if not (low <= min(values) and max(values) < (1 << bits)):
+      raise OverflowError('int too big to convert')
+    return cls.narrow(cls.widecodec.encode_array(values))
 
 
 Int8s = RegularIntegerCodec.classfactory('Int8s',
@@ -116,5 +405,29 @@ Int64ub = RegularIntegerCodec.classfactory('Int64ub',
 )
 
 
-del _sys_
+Int24sl = IrregularIntegerCodec.classfactory('Int24sl',
+  bitsize=24,
+  signed=True,
+  byteorder='little',
+)
+
+Int24ul = IrregularIntegerCodec.classfactory('Int24ul',
+  bitsize=24,
+  signed=False,
+  byteorder='little',
+)
+
+Int24sb = IrregularIntegerCodec.classfactory('Int24sb',
+  bitsize=24,
+  signed=True,
+  byteorder='big',
+)
+
+Int24ub = IrregularIntegerCodec.classfactory('Int24ub',
+  bitsize=24,
+  signed=False,
+  byteorder='big',
+)
+
+
 del _Codec_
@@ -17,5 +17,13 @@ class RawCodec(_Codec_):
       assert len(data) == cls.bitsize
     return data
 
+  @classmethod
+  def encode_into(cls, buffer, offset, data):
+    if cls.bitsize != ...:
+      assert len(data) == cls.bitsize
+    end = offset + len(data)
+    buffer[offset:end] = data
+    return end
+
 
 del _Codec_
@@ -0,0 +1,122 @@
+import collections as _collections_
+import struct as _struct_
+
+from si.codec import Codec as _Codec_
+
+
+class RecordCodec(_Codec_):
+  """
+  Codec of fixed size records made of named fields.
+
+  Fields should be given as (name, codec) pairs or as a
+  mapping. All fields get decoded with a single precompiled
+  struct.Struct; fields which can not be expressed as a struct
+  item are unpacked as raw bytes and passed to the decode()
+  method of their codec. Records are decoded to instances of
+  the Record namedtuple.
+
+  >>> from si.codec import integer
+  >>> DateFields = RecordCodec.classfactory('DateFields',
+  ...     fields=(('yy', integer.Int8u), ('mm', integer.Int8u),
+  ...         ('dd', integer.Int8u)))
+  >>> DateFields.decode(b'\\x12\\x0A\\x11')
+  DateFieldsRecord(yy=18, mm=10, dd=17)
+  >>> DateFields.encode((18, 10, 17))
+  b'\\x12\\n\\x11'
+  >>> DateFields.encode((18, 10))
+  Traceback (most recent call last):
+    ...
+  ValueError: DateFields expects 3 values, got 2
+  """
+
+  fields = NotImplemented
+  byteorder = 'big'
+
+  def __init_subclass__(cls, **kwargs):
+    super().__init_subclass__(**kwargs)
+    if cls.fields is NotImplemented:
+      return
+    if isinstance(cls.fields, dict):
+      cls.fields = tuple(cls.fields.items())
+    else:
+      cls.fields = tuple(cls.fields)
+    items = [codec._structitem() for _, codec in cls.fields]
+    byteorders = {i[0] for i in items if i and i[0]}
+    if len(byteorders) == 1:
+      cls.byteorder = byteorders.pop()
+    fmt = {'little': '<', 'big': '>'}[cls.byteorder]
+    converters = []
+    for (name, codec), item in zip(cls.fields, items):
+      if item is None or item[0] not in (None, cls.byteorder):
+        if not isinstance(codec.bitsize, int):
+          raise TypeError(f'field {name!r}: {codec.__name__} '
+              'has no fixed size')
+        item = (None, f'{codec.bitsize // 8}s', codec.decode)
+      fmt += item[1]
+      converters.append(item[2])
+    cls._struct = _struct_.Struct(fmt)
+    cls.bitsize = cls._struct.size * 8
+    cls.Record = _collections_.namedtuple(
+        f'{cls.__name__}Record',
+        (name for name, _ in cls.fields),
+    )
+    cls._make_record = staticmethod(
+        cls._record_maker(cls.Record, converters)
+    )
+  #keep _collections_
+  #keep _struct_
+
+  @staticmethod
+  def _record_maker(record_type, converters):
+    make = record_type._make
+    if not any(converters):
+      return make
+    conv = tuple(
+        (c if c else (lambda v: v)) for c in converters
+    )
+    def make_record(values):
+      return make([c(v) for c, v in zip(conv, values)])
+    return make_record
+
+  @classmethod
+  @_Codec_.decodemethod(readonly=True)
+  def decode(cls, data):
+    return cls._make_record(cls._struct.unpack(data))
+
+  @classmethod
+  def _values(cls, obj):
+    if isinstance(obj, dict):
+      return [obj[name] for name, _ in cls.fields]
+    obj = tuple(obj)
+    if len(obj) != len(cls.fields):
+      raise ValueError(f'{cls.__name__} expects'
+          f' {len(cls.fields)} values, got {len(obj)}')
+    return obj
+
+  @classmethod
+  @_Codec_.encodemethod
+  def encode(cls, obj):
+    return b''.join(
+        codec.encode(value)
+        for (_, codec), value in zip(cls.fields, cls._values(obj))
+    )
+
+  @classmethod
+  def encode_into(cls, buffer, offset, obj):
+    for (_, codec), value in zip(cls.fields, cls._values(obj)):
+      offset = codec.encode_into(buffer, offset, value)
+    return offset
+
+  @classmethod
+  def decode_many(cls, data, stride=None, *, offsets=None,
+      size=None):
+    s = cls._struct
+    if size not in (None, s.size):
+      return super().decode_many(data, stride,
+          offsets=offsets, size=size)
+    size, offsets = cls._records(data, stride, offsets, s.size)
+    make = cls._make_record
+    return [make(v) for v in cls._unpack(s, data, offsets)]
+
+
+del _Codec_
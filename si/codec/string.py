@@ -8,9 +8,9 @@ class FixedSizeStringCodec(_Codec_):
   chars = NotImplemented
 
   @classmethod
-  @_Codec_.decodemethod
+  @_Codec_.decodemethod(readonly=True)
   def decode(cls, data):
-    return data.decode(cls.encoding)
+    return str(data, cls.encoding)
 
   @classmethod
   @_Codec_.encodemethod
@@ -19,5 +19,21 @@ class FixedSizeStringCodec(_Codec_):
     objstr = str(obj)[:cls.chars]
     return fs.format(objstr).encode(cls.encoding)
 
+  @classmethod
+  def encode_into(cls, buffer, offset, obj):
+    objstr = str(obj)[:cls.chars].rjust(cls.chars, cls.filler)
+    end = offset + cls.chars
+    buffer[offset:end] = objstr.encode(cls.encoding)
+    return end
+
+  @classmethod
+  def _structitem(cls):
+    if (cls._mask is not None
+        or cls.decode.__func__
+        is not FixedSizeStringCodec.decode.__func__):
+      return None
+    encoding = cls.encoding
+    return None, f'{cls.chars}s', lambda b: str(b, encoding)
+
 
 del _Codec_
@@ -1,7 +1,9 @@
 import datetime as _datetime_
+import struct as _struct_
 
 from si.codec import Codec as _Codec_
 from . import integer as _integer_
+from . import record as _record_
 
 # References:
 # Communication.cs 0917311 (#L3007-3022)
@@ -9,12 +11,19 @@ class DateCodec(_Codec_):
 
   bitsize = 24
 
+  FieldsCodec = _record_.RecordCodec.classfactory(
+    'DateFields',
+    fields=(
+      ('yy', _integer_.Int8u),
+      ('mm', _integer_.Int8u),
+      ('dd', _integer_.Int8u),
+    ),
+  )
+
   @classmethod
-  @_Codec_.decodemethod
+  @_Codec_.decodemethod(readonly=True)
   def decode(cls, data):
-    yy = _integer_.Int8u.decode(data[0:1])
-    mm = _integer_.Int8u.decode(data[1:2])
-    dd = _integer_.Int8u.decode(data[2:])
+    yy, mm, dd = cls.FieldsCodec.decode(data)
     now_year = _datetime_.datetime.now().year
     if yy <= now_year - 2000:
       yyyy = yy + 2000
@@ -22,7 +31,6 @@ class DateCodec(_Codec_):
       yyyy = yy + 1900
     return _datetime_.date(yyyy, mm, dd)
   #keep _datetime_
-  #keep _integer_
 
   @classmethod
   @_Codec_.encodemethod
@@ -33,5 +41,58 @@ class DateCodec(_Codec_):
         + _integer_.Int8u.encode(obj.day))
   #keep _integer_
 
+  @classmethod
+  def encode_into(cls, buffer, offset, obj):
+    _struct_.pack_into('3B', buffer, offset,
+        obj.year % 100, obj.month, obj.day)
+    return offset + 3
+  #keep _struct_
+
+
+# References:
+# PCPROG5 (p. 17)
+class PunchTimeCodec(_Codec_):
+  """
+  Codec of the TD TH TL TSS bytes of punch records
+
+  Bit 0 of TD is the half of the day, TH TL are the seconds of
+  the half day and TSS is in 1/256 seconds. Decodes to a
+  datetime.time, or to None for the EEEEh "no time" value. The
+  day of week and week counter bits of TD are not decoded.
+
+  >>> import datetime
+  >>> PunchTimeCodec.decode(b'\\x01\\x0c\\x59\\x80')
+  datetime.time(12, 52, 41, 500000)
+  >>> PunchTimeCodec.encode(datetime.time(12, 52, 41, 500000))
+  b'\\x01\\x0cY\\x80'
+  """
+
+  bitsize = 32
+
+  @classmethod
+  @_Codec_.decodemethod(readonly=True)
+  def decode(cls, data):
+    td, seconds, tss = _struct_.unpack('>BHB', data)
+    if seconds == 0xEEEE:
+      return None
+    seconds += (td & 1) * 12 * 3600
+    minutes, second = divmod(seconds, 60)
+    return _datetime_.time(minutes // 60, minutes % 60, second,
+        tss * 1000000 // 256)
+  #keep _datetime_
+  #keep _struct_
+
+  @classmethod
+  @_Codec_.encodemethod
+  def encode(cls, obj):
+    if obj is None:
+      return b'\x00\xEE\xEE\x00'
+    seconds = obj.hour * 3600 + obj.minute * 60 + obj.second
+    pm, seconds = divmod(seconds, 12 * 3600)
+    return _struct_.pack('>BHB', pm, seconds,
+        obj.microsecond * 256 // 1000000)
+  #keep _struct_
+
 
 del _Codec_
+del _record_
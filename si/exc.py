@@ -1 +1,3 @@
 class CRCError(ValueError): pass
+class FrameError(ValueError): pass
+class NAKError(Exception): pass
@@ -16,11 +16,13 @@ class BaseStation:
     )
     # sysdata is assumed to stay in the first part of memory
     self._sysdata = _memory_.SysDataMemory(
-        memoryview(self._memory[:self.SYSDATA_SIZE])
+        memoryview(self._memory[:self.SYSDATA_SIZE]),
+        parent=self._memory, offset=0
     )
     # backup memory is assumed to stay from START_ADR to the end
     self._backupmemory = _memory_.BackupMemory(
-        memoryview(self._memory[self.START_ADR:])
+        memoryview(self._memory[self.START_ADR:]),
+        parent=self._memory, offset=self.START_ADR
     )
 
     self._sysdata['ProductFamily'] = self.PRODUCT_FAMILY
@@ -17,10 +17,10 @@ class ProductFamilyCodec(_Codec_):
   )
 
   @classmethod
-  @_Codec_.decodemethod
+  @_Codec_.decodemethod(readonly=True)
   def decode(cls, data, idxmap):
-    value = data[idxmap['CFG0']]
-    return cls.subcodec.decode([value])
+    i = idxmap['CFG0']
+    return cls.subcodec.decode(data[i:i+1])
 
   @classmethod
   @_Codec_.encodemethod(pass_data=True)
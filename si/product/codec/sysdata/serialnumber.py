@@ -15,15 +15,16 @@ class SerialNumberCodec(_Codec_):
   subcodec = _integer_.Int32ub
 
   @classmethod
-  @_Codec_.decodemethod
+  @_Codec_.decodemethod(readonly=True)
   def decode(cls, data, idxmap):
-    data_keys = ('BN3', 'BN2', 'BN1', 'BN0')
-    idxs = tuple(idxmap[key] for key in data_keys)
-    data_ = [data[i] for i in idxs]
+    # BN3, BN2, BN1, BN0 are consecutive addresses
+    i = idxmap['BN3']
     pfam = _productfamily_.codec.decode(data, idxmap)
     if pfam is _ProductFamily_.SimSrr:
-      data_[0] = 0
-    return cls.subcodec.decode(data_)
+      # BN3 is not part of the serial number
+      return _integer_.Int24ub.decode(data[i+1:i+4])
+    return cls.subcodec.decode(data[i:i+4])
+  #keep _integer_
   #keep _productfamily_
   #keep _ProductFamily_
 
@@ -48,4 +49,3 @@ codec = SerialNumberCodec
 
 
 del _Codec_
-del _integer_
@@ -3,6 +3,7 @@
 #   0917311 (#L6176-L6765)
 
 import enum as _enum_
+import weakref as _weakref_
 
 from si.utils import view as _view_
 from .codec import sysdata as _sysdata_
@@ -154,12 +155,29 @@ class SysAddr(_enum_.IntEnum):
 
 
 class Memory:
+  """
+  Data buffer with its values accessed by codec_map keys
 
+  A Memory over a part of the data of another one is registered
+  with it by giving that as parent and the start of the part as
+  offset. Writes through any memory of such a family drop the
+  cached values of the lazy views of all of them.
+  """
+
+  codec_map = None
   idxmap = None
+  keyaddr_map = None
   str_encoding = 'iso8859-1'
 
-  def __init__(self, data):
+  def __init__(self, data, *, parent=None, offset=0):
     self._data = data
+    self._views = _weakref_.WeakSet()
+    self._children = _weakref_.WeakKeyDictionary()
+    self._parent = parent
+    self._offset = offset
+    if parent is not None:
+      parent._children[self] = offset
+  #keep _weakref_
 
   @property
   def data(self):
@@ -178,17 +196,21 @@ class Memory:
 
   def __setitem__(self, key, value):
     if isinstance(key, (int, slice)):
-      return self._data.__setitem__(key, value)
+      result = self._data.__setitem__(key, value)
     else:
       idxs = self.get_idxs(key)
       codec = self.get_codec(key)
       kwargs_ = {}
       if self.idxmap is not None:
         kwargs_['idxmap'] = self.idxmap
-      return codec.encode(
+      result = codec.encode(
           value, data=self._data, idxs=idxs,
           **kwargs_
       )
+    if (self._views or self._children
+        or self._parent is not None):
+      self.invalidate_views(key)
+    return result
 
   def __str__(self):
     return _view_.hexview(
@@ -205,10 +227,157 @@ class Memory:
   def get_idxs(self, key):
     return None
 
+  def get_key_idxs(self, key):
+    """
+    Return the set of data indexes the value of key depends on
+    or None if they are unknown.
+    """
+    if self.keyaddr_map is None or key not in self.keyaddr_map:
+      return None
+    idxmap = self.idxmap
+    return frozenset(
+        (idxmap[a] if idxmap else a)
+        for a in self.keyaddr_map[key]
+    )
+
+  def invalidate_views(self, key=None):
+    """
+    Drop the cached values of the lazy views of this memory and
+    of the memories registered with it or its parent which
+    depend on data written with the given key (an index, a slice
+    or a codec_map key). All cached values are dropped if key is
+    None.
+
+    Writes through __setitem__ call this automatically; data
+    changed in any other way (e.g. directly in the buffer)
+    should be followed by a call.
+    """
+    size = len(self._data)
+    if key is None:
+      written = None
+    elif isinstance(key, int):
+      written = range(key % size, key % size + 1)
+    elif isinstance(key, slice):
+      written = range(*key.indices(size))
+    else:
+      written = self.get_key_idxs(key)
+    memory = self
+    while memory._parent is not None:
+      written = _shift(written, memory._offset, None)
+      memory = memory._parent
+    memory._invalidate_written(written)
+
+  def _invalidate_written(self, written):
+    for view in self._views:
+      view.invalidate_written(written)
+    for child, offset in tuple(self._children.items()):
+      child_written = _shift(written, -offset, len(child._data))
+      if child_written is None or child_written:
+        child._invalidate_written(child_written)
+
+  def view(self):
+    "Return a new LazyView of this memory."
+    return LazyView(self)
+
   def set_data(self, key, value):
     return self._data.__setitem__(key, value)
 
 
+def _shift(written, offset, size):
+  # Return the written indexes (None or a range or a set) moved
+  # by offset and limited to range(size) unless size is None.
+  if written is None:
+    return None
+  if isinstance(written, range) and written.step == 1:
+    start, stop = written.start + offset, written.stop + offset
+    if size is not None:
+      start, stop = max(start, 0), min(stop, size)
+    return range(start, max(start, stop))
+  return frozenset(
+      i + offset for i in written
+      if size is None or 0 <= i + offset < size
+  )
+
+
+class LazyView:
+  """
+  Attribute access view of a Memory.
+
+  Each codec_map key of the memory is available as an
+  attribute which gets decoded on first access and cached
+  afterwards. Cached values depending on data written through
+  the memory's __setitem__ (or through attribute assignment on
+  the view) get dropped automatically.
+
+  >>> from si.product import bs
+  >>> station = bs.BaseStation()
+  >>> sysdata = station.sysdata.view()
+  >>> sysdata.SerialNumber
+  0
+  >>> station.sysdata['SerialNumber'] = 123456
+  >>> sysdata.SerialNumber
+  123456
+  >>> station.memory[0:4] = bytes.fromhex('00010209')
+  >>> sysdata.SerialNumber
+  66057
+  """
+
+  def __init__(self, memory):
+    object.__setattr__(self, '_memory', memory)
+    object.__setattr__(self, '_key_idxs', {
+        key: memory.get_key_idxs(key)
+        for key in (memory.codec_map or ())
+    })
+    memory._views.add(self)
+
+  def __dir__(self):
+    return sorted({*super().__dir__(), *self._key_idxs})
+
+  def __getattr__(self, name):
+    if name not in self._key_idxs:
+      raise AttributeError(
+          f'{type(self).__name__!r} object has no attribute '
+          f'{name!r}'
+      )
+    value = self._memory[name]
+    # stored as instance attribute so further accesses do not
+    # reach __getattr__ until invalidated
+    self.__dict__[name] = value
+    return value
+
+  def __setattr__(self, name, value):
+    if name not in self._key_idxs:
+      raise AttributeError(f'can\'t set attribute {name!r}')
+    self._memory[name] = value
+
+  @property
+  def memory(self):
+    return self._memory
+
+  def invalidate(self, *names):
+    "Drop the cached values of names or all if none given."
+    for name in (names or tuple(self._key_idxs)):
+      self.__dict__.pop(name, None)
+
+  def invalidate_written(self, written):
+    """
+    Drop the cached values depending on the written data which
+    can be an index, a slice, a set of indexes or None if
+    unknown.
+    """
+    if written is None:
+      return self.invalidate()
+    if isinstance(written, int):
+      written = (written,)
+    elif isinstance(written, slice):
+      written = range(*written.indices(len(self._memory.data)))
+    cached = [k for k in self._key_idxs if k in self.__dict__]
+    for name in cached:
+      idxs = self._key_idxs[name]
+      if idxs is None or any(i in written for i in idxs):
+        del self.__dict__[name]
+
+
 class SysDataMemory(Memory):
 
   codec_map = {
@@ -11,7 +11,13 @@ from ._baserawinstr import BaseRawInstruction
 BaseRawInstruction.__module__ = __name__
 from . import extended
 from . import legacy
+from ._parser import StreamParser
+StreamParser.__module__ = __name__
+from ._framecache import FrameCache
+FrameCache.__module__ = __name__
 
 
 del _baserawinstr
 del _common
+del _framecache
+del _parser
@@ -7,17 +7,17 @@ class BaseRawInstruction(_Codec_):
 
   WAKEUPByte = _constant_.ConstantCodec.classfactory(
     'WAKEUPByte',
-    data=_ProtoChar_.WAKEUP.value,
+    data=bytes((_ProtoChar_.WAKEUP.value,)),
   )
 
   STXByte = _constant_.ConstantCodec.classfactory(
     'STXByte',
-    data=_ProtoChar_.STX.value,
+    data=bytes((_ProtoChar_.STX.value,)),
   )
 
   ETXByte = _constant_.ConstantCodec.classfactory(
     'ETXByte',
-    data=_ProtoChar_.ETX.value,
+    data=bytes((_ProtoChar_.ETX.value,)),
   )
 
 
@@ -0,0 +1,103 @@
+import collections as _collections_
+
+from si.protocol import ProtoChar as _ProtoChar_
+from si.protocol import extended as _extended_
+from si.protocol import legacy as _legacy_
+
+
+class FrameCache:
+  """
+  Bounded cache of encoded instructions
+
+  Keys are (cmd, data) pairs where cmd is an extended or legacy
+  Cmd member or a ProtoChar handshake (with empty data) and the
+  values are the encoded instructions as bytes. Least recently
+  used entries get evicted when maxsize is reached; preloaded
+  entries are kept.
+
+  >>> from si.protocol import ProtoChar, extended
+  >>> cache = FrameCache()
+  >>> cache.get(ProtoChar.ACK)
+  b'\\x06'
+  >>> cache.get(extended.Cmd.GET_SYSDATA, b'\\x00\\x80')
+  b'\\xff\\x02\\x83\\x02\\x00\\x80\\xbf\\x17\\x03'
+  >>> cache.get(extended.Cmd.GET_SYSDATA, b'\\x00\\x80')
+  b'\\xff\\x02\\x83\\x02\\x00\\x80\\xbf\\x17\\x03'
+  >>> cache.hits, cache.misses
+  (2, 1)
+  """
+
+  preload = (
+      (_ProtoChar_.ACK, b''),
+      (_ProtoChar_.NAK, b''),
+      (_extended_.Cmd.CLEAR_CARD_VALUE, b''),
+      (_extended_.Cmd.ERASE_B_DATA, b''),
+      (_extended_.Cmd.GET_MS, b''),
+      (_extended_.Cmd.GET_TIME, b''),
+  )
+
+  def __init__(self, maxsize=256, *, wakeup=1, stx=1):
+    self.maxsize = maxsize
+    self.wakeup = wakeup
+    self.stx = stx
+    self.hits = 0
+    self.misses = 0
+    self._preloaded = {}
+    self._frames = _collections_.OrderedDict()
+    for cmd, data in self.preload:
+      self._preloaded[cmd, data] = self.encode(cmd, data)
+  #keep _collections_
+
+  def __len__(self):
+    return len(self._preloaded) + len(self._frames)
+
+  def clear(self):
+    "Drop the cached entries except the preloaded ones."
+    self._frames.clear()
+
+  def encode(self, cmd, data=b''):
+    "Return the encoded instruction without caching."
+    if isinstance(cmd, _ProtoChar_):
+      assert not data
+      return bytes((cmd.value,))
+    if isinstance(cmd, _legacy_.Cmd):
+      codec = _legacy_.LegacyRawInstruction
+    else:
+      codec = _extended_.ExtendedRawInstruction
+    obj = codec.make_obj(
+        cmd, data, wakeup=self.wakeup, stx=self.stx
+    )
+    return codec.encode(obj)
+  #keep _extended_
+  #keep _legacy_
+  #keep _ProtoChar_
+
+  def get(self, cmd, data=b''):
+    "Return the encoded instruction, from the cache if possible."
+    key = (cmd, bytes(data))
+    frame = self._preloaded.get(key)
+    if frame is not None:
+      self.hits += 1
+      return frame
+    frames = self._frames
+    frame = frames.get(key)
+    if frame is not None:
+      frames.move_to_end(key)
+      self.hits += 1
+      return frame
+    self.misses += 1
+    frame = self.encode(cmd, data)
+    if self.maxsize:
+      frames[key] = frame
+      if self.maxsize < len(frames):
+        frames.popitem(last=False)
+    return frame
+
+  def stats(self):
+    "Return the counters as a dict."
+    return {
+        'hits': self.hits,
+        'misses': self.misses,
+        'size': len(self),
+        'maxsize': self.maxsize,
+    }
@@ -0,0 +1,182 @@
+from si import exc as _exc_
+from si.protocol import Mode as _Mode_, ProtoChar as _ProtoChar_
+from si.protocol.extended import \
+    Cmd as _ExtendedCmd_, \
+    ExtendedStreamParser as _ExtendedStreamParser_
+from si.protocol.legacy import \
+    LegacyStreamParser as _LegacyStreamParser_
+
+
+_HANDSHAKES = {
+    c.value: c for c in (_ProtoChar_.ACK, _ProtoChar_.NAK)
+}
+_EXTENDED_CMDS = frozenset(cmd.value[0] for cmd in _ExtendedCmd_)
+_STX = _ProtoChar_.STX.value
+_WAKEUP = _ProtoChar_.WAKEUP.value
+
+
+class StreamParser:
+  """
+  Push parser which detects the protocol mode of the stream.
+
+  Until the mode is known the received bytes are buffered and
+  checked for a complete extended instruction with valid CRC or
+  a complete legacy instruction. The first one found sets the
+  mode and the buffered bytes from the start of that
+  instruction are passed to the parser of that mode; bytes
+  before it are dropped. When mode is given, detection is
+  skipped. Detection fails with si.exc.FrameError if more than
+  detect_limit bytes arrive without a valid instruction.
+  Handshake bytes are returned as with ExtendedStreamParser,
+  even before the mode is detected.
+
+  >>> parser = StreamParser()
+  >>> parser.feed(b'\\x02\\x31\\x10')
+  []
+  >>> parser.mode
+  <Mode.NotSet: -1>
+  >>> parser.feed(b'\\x03\\x03')  # doctest: +ELLIPSIS
+  [LegacyRawInstructionParts(wakeup=0, stx=1, cmd=..., data=b'\\x03', etx=1)]
+  >>> parser.mode
+  <Mode.Legacy: 0>
+  >>> StreamParser().feed(b'\\x00\\x02\\x31\\x03')  # doctest: +ELLIPSIS
+  [LegacyRawInstructionParts(wakeup=0, stx=1, ...)]
+
+  Legacy instructions in the data of an incomplete extended
+  instruction are not mistaken for the start of the stream:
+
+  >>> parser = StreamParser()
+  >>> frame = bytes.fromhex('ff02830a000102023141420305060bf303')
+  >>> parser.feed(frame[:13]), parser.mode
+  ([], <Mode.NotSet: -1>)
+  >>> parser.feed(frame[13:])[0].data, parser.mode
+  (b'\\x00\\x01\\x02\\x021AB\\x03\\x05\\x06', <Mode.Extended: 1>)
+  """
+
+  detect_limit = 1024
+
+  def __init__(self, mode=_Mode_.NotSet, *, resync=False,
+      handshake=False):
+    self.resync = resync
+    self.handshake = handshake
+    self._buf = bytearray()
+    self._parser = None
+    self.mode = mode
+  #keep _Mode_
+
+  @property
+  def mode(self):
+    return self._mode
+
+  @mode.setter
+  def mode(self, mode):
+    mode = _Mode_(mode)
+    if mode is _Mode_.Extended:
+      self._parser = _ExtendedStreamParser_(
+          resync=self.resync, handshake=self.handshake
+      )
+    elif mode is _Mode_.Legacy:
+      self._parser = _LegacyStreamParser_(
+          handshake=self.handshake
+      )
+    else:
+      self._parser = None
+    self._mode = mode
+  #keep _ExtendedStreamParser_
+  #keep _LegacyStreamParser_
+  #keep _Mode_
+
+  @property
+  def parser(self):
+    "The parser of the detected mode or None."
+    return self._parser
+
+  @property
+  def in_frame(self):
+    "True if an instruction has been started but not completed."
+    if self._parser is None:
+      return bool(self._buf)
+    return self._parser.in_frame
+
+  def reset(self):
+    "Drop the buffered bytes and restart mode detection."
+    self._buf.clear()
+    self.mode = _Mode_.NotSet
+  #keep _Mode_
+
+  def detect(self, data):
+    "Return the protocol mode of the first valid instruction."
+    return self._detect(data)[0]
+
+  def _detect(self, data):
+    # Try both protocols from every STX run (with its leading
+    # WAKEUP bytes) and return the mode and start of the first
+    # valid instruction.
+    # An incomplete extended instruction is waited for before
+    # its data is searched for instructions.
+    n = len(data)
+    i = 0
+    j = data.find(_STX)
+    while 0 <= j:
+      w = j
+      while i < w and data[w-1] == _WAKEUP:
+        w -= 1
+      tail = bytes(data[w:])
+      for mode, parser in (
+          (_Mode_.Extended, _ExtendedStreamParser_()),
+          (_Mode_.Legacy, _LegacyStreamParser_()),
+          ):
+        try:
+          frames = parser.feed(tail)
+        except ValueError as e:
+          frames = e.frames
+        if frames:
+          return mode, w
+      i = j
+      while i < n and data[i] == _STX:
+        i += 1
+      if (i + 1 < n and data[i] in _EXTENDED_CMDS
+          and n < i + data[i+1] + 5):
+        break
+      j = data.find(_STX, i)
+    return _Mode_.NotSet, 0
+  #keep _EXTENDED_CMDS
+  #keep _ExtendedStreamParser_
+  #keep _LegacyStreamParser_
+  #keep _Mode_
+  #keep _STX
+  #keep _WAKEUP
+
+  def feed(self, data):
+    "Parse data and return the list of completed instructions."
+    if self._parser is not None:
+      return self._parser.feed(data)
+    buf = self._buf
+    buf += data
+    handshakes = []
+    if self.handshake:
+      while buf and buf[0] in _HANDSHAKES:
+        handshakes.append(_HANDSHAKES[buf.pop(0)])
+    mode, start = self._detect(buf)
+    if mode is _Mode_.NotSet:
+      if self.detect_limit < len(buf):
+        buf.clear()
+        exc = _exc_.FrameError('protocol mode detection failed')
+        exc.frames = handshakes
+        raise exc
+      return handshakes
+    if self.handshake:
+      handshakes.extend(
+          _HANDSHAKES[b] for b in buf[:start] if b in _HANDSHAKES
+      )
+    self.mode = mode
+    data = bytes(buf[start:])
+    buf.clear()
+    return handshakes + self._parser.feed(data)
+  #keep _exc_
+  #keep _HANDSHAKES
+  #keep _Mode_
+
+
+del _ExtendedCmd_
+del _ProtoChar_
@@ -1,15 +1,22 @@
 __all__ = [
     ]
 
-from ._common import crc, Cmd
+from ._common import crc, Cmd, CrcState
 crc.__module__ = __name__
+CrcState.__module__ = __name__
 Cmd.__module__ = __name__
 from ._rawinstr import ExtendedRawInstruction, \
   codec as rawinstr_codec
 ExtendedRawInstruction.__module__ = __name__
+from ._frame import ExtendedFrame
+ExtendedFrame.__module__ = __name__
+from ._parser import ExtendedStreamParser
+ExtendedStreamParser.__module__ = __name__
 from . import command
 from . import response
 
 
 del _common
+del _frame
+del _parser
 del _rawinstr
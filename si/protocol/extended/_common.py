@@ -1,44 +1,138 @@
+import array as _array_
 import enum as _enum_
 import struct as _struct_
+import sys as _sys_
 
 
 CRC_BITF = 0x8000
 CRC_POLY = 0x8005
 
+_crc_tables = {}
+
+
+def _crc_word_table(crc_bitf, crc_poly):
+  # Returns the table of the register values after shifting
+  # 16 zero bits into each possible register value. As the
+  # input bits enter at the bottom and need 16 shifts to reach
+  # the top, feeding a 16-bit word w becomes
+  # reg = table[reg] ^ w.
+  key = (crc_bitf, crc_poly)
+  if key not in _crc_tables:
+    byte_table = []
+    for t in range(256):
+      num = t << 8
+      for _ in range(8):
+        test = num & crc_bitf
+        num = (num << 1) & 0xFFFF
+        if test:
+          num ^= crc_poly
+      byte_table.append(num)
+    shift8 = [
+        ((r << 8) & 0xFFFF) ^ byte_table[r >> 8]
+        for r in range(0x10000)
+    ]
+    _crc_tables[key] = _array_.array(
+        'H', (shift8[r] for r in shift8)
+    )
+  return _crc_tables[key]
+#keep _array_
+
+
+class CrcState:
+  """
+  Incremental CRC calculation of the extended protocol.
 
-def crc(data, *, crc_bitf=None, crc_poly=None):
+  Bytes can be fed in chunks of any size with update(); the
+  result is bit-exact with the PCPROG5 algorithm.
+
+  >>> state = CrcState(b'\\x83\\x02')
+  >>> state.update(b'\\x00\\x80')
+  >>> state.digest()
+  b'\\xbf\\x17'
+  >>> crc(b'\\x83\\x02\\x00\\x80')
+  b'\\xbf\\x17'
+  """
   # References:
   # PCPROG5 (p. 5)
   # Helper.cs 0917311 (#L681-L742)
-  crc_bitf = (CRC_BITF if crc_bitf is None else crc_bitf)
-  crc_poly = (CRC_POLY if crc_poly is None else crc_poly)
-  if len(data) < 2:
-    num = 0
-  else:
-    num = 256 * data[0] + data[1]
-    if len(data) > 2:
-      i = 3
-      while i <= len(data) + 2:
-        if i < len(data):
-          num2 = 256 * data[i - 1] + data[i]
-          i += 1
-        else:
-          if i == len(data):
-            num2 = 256 * data[i - 1]
-          else:
-            num2 = 0
-          i += 2
-        for j in range(0, 16):
-          test = num & crc_bitf
-          num = num + num & 65535
-          if num2 & crc_bitf:
-            num = num + 1 & 65535
-          if test:
-            num = (num ^ crc_poly) & 65535
-          num2 += num2 & 65535
-        i += 1
-  return cls(_struct_.pack('>H', num))
-#keep _struct_
+
+  __slots__ = ('_count', '_num', '_pending', '_table')
+
+  def __init__(self, data=b'', *, crc_bitf=None, crc_poly=None):
+    crc_bitf = (CRC_BITF if crc_bitf is None else crc_bitf)
+    crc_poly = (CRC_POLY if crc_poly is None else crc_poly)
+    self._table = _crc_word_table(crc_bitf, crc_poly)
+    self._count = 0
+    self._num = 0
+    self._pending = None
+    if data:
+      self.update(data)
+
+  def __len__(self):
+    return self._count
+
+  def copy(self):
+    new = CrcState.__new__(CrcState)
+    new._table = self._table
+    new._count = self._count
+    new._num = self._num
+    new._pending = self._pending
+    return new
+
+  def update(self, chunk):
+    "Feed the bytes of chunk."
+    chunk = memoryview(chunk).cast('B')
+    n = len(chunk)
+    if not n:
+      return
+    i = 0
+    num = self._num
+    # the first two bytes make the initial register value
+    while self._count + i < 2 and i < n:
+      num = (num << 8) + chunk[i]
+      i += 1
+    if self._pending is not None and i < n:
+      num = self._table[num] ^ ((self._pending << 8) + chunk[i])
+      self._pending = None
+      i += 1
+    end = i + (n - i) // 2 * 2
+    if i < end:
+      words = _array_.array('H')
+      words.frombytes(chunk[i:end])
+      if _sys_.byteorder == 'little':
+        words.byteswap()
+      table = self._table
+      for w in words:
+        num = table[num] ^ w
+    if end < n:
+      self._pending = chunk[end]
+    self._num = num
+    self._count += n
+  #keep _array_
+  #keep _sys_
+
+  def value(self):
+    "Return the CRC of the bytes fed so far as an integer."
+    if self._count < 2:
+      return 0
+    elif self._count == 2:
+      return self._num
+    elif self._pending is None:
+      return self._table[self._num]
+    else:
+      return self._table[self._num] ^ (self._pending << 8)
+
+  def digest(self):
+    "Return the CRC of the bytes fed so far as two bytes."
+    return _struct_.pack('>H', self.value())
+  #keep _struct_
+
+
+def crc(data, *, crc_bitf=None, crc_poly=None):
+  "Return the CRC of data as two bytes."
+  return CrcState(
+      data, crc_bitf=crc_bitf, crc_poly=crc_poly
+  ).digest()
 
 
 class Cmd(_enum_.Enum):
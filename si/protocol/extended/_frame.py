@@ -0,0 +1,103 @@
+from si.protocol import ProtoChar as _ProtoChar_
+from si.protocol.extended import \
+    Cmd as _Cmd_, \
+    ExtendedRawInstruction as _ExtendedRawInstruction_
+
+
+_CMDS = {cmd.value[0]: cmd for cmd in _Cmd_}
+_ETX = bytes((_ProtoChar_.ETX.value,))
+_STX = bytes((_ProtoChar_.STX.value,))
+_WAKEUP = bytes((_ProtoChar_.WAKEUP.value,))
+
+
+class ExtendedFrame:
+  """
+  Compact received extended protocol instruction
+
+  It refers to the receive buffer (bytes) and the offset of the
+  CMD byte in it instead of copying the instruction parts. CMD,
+  data and CRC are exposed as memoryviews of the buffer. Use
+  to_parts() to get the ExtendedRawInstruction.Parts.
+
+  >>> buffer = b'\\xFF\\x02\\x83\\x02\\x00\\x80\\xBF\\x17\\x03'
+  >>> frame = ExtendedFrame(buffer, 2, wakeup=1)
+  >>> frame.command, bytes(frame.data), bytes(frame.crc)
+  (<Cmd.GET_SYSDATA: b'\\x83'>, b'\\x00\\x80', b'\\xbf\\x17')
+  >>> bytes(frame)
+  b'\\xff\\x02\\x83\\x02\\x00\\x80\\xbf\\x17\\x03'
+  """
+
+  __slots__ = ('buffer', 'offset', 'wakeup', 'stx')
+
+  Parts = _ExtendedRawInstruction_.Parts
+
+  def __init__(self, buffer, offset=0, *, wakeup=0, stx=1):
+    self.buffer = buffer
+    self.offset = offset
+    self.wakeup = wakeup
+    self.stx = stx
+  #keep _ExtendedRawInstruction_
+
+  def __repr__(self):
+    return (f'<{self.__class__.__name__} {self.command.name}'
+        f' len={self.len}>')
+
+  def __bytes__(self):
+    i = self.offset
+    return b''.join((
+        _WAKEUP * self.wakeup,
+        _STX * self.stx,
+        self.buffer[i:i+self.len+5],
+    ))
+  #keep _STX
+  #keep _WAKEUP
+
+  def __eq__(self, other):
+    if isinstance(other, ExtendedFrame):
+      return bytes(self) == bytes(other)
+    return NotImplemented
+
+  __hash__ = None
+
+  @classmethod
+  def from_parts(cls, parts):
+    buffer = b''.join((
+        parts.cmd.value, bytes((parts.len,)), parts.data,
+        parts.crc, _ETX,
+    ))
+    return cls(buffer, 0, wakeup=parts.wakeup, stx=parts.stx)
+  #keep _ETX
+
+  @property
+  def cmd(self):
+    i = self.offset
+    return memoryview(self.buffer)[i:i+1]
+
+  @property
+  def command(self):
+    return _CMDS[self.buffer[self.offset]]
+  #keep _CMDS
+
+  @property
+  def len(self):
+    return self.buffer[self.offset+1]
+
+  @property
+  def data(self):
+    i = self.offset + 2
+    return memoryview(self.buffer)[i:i+self.len]
+
+  @property
+  def crc(self):
+    i = self.offset + 2 + self.len
+    return memoryview(self.buffer)[i:i+2]
+
+  def to_parts(self):
+    return self.Parts(
+        self.wakeup, self.stx, self.command, self.len,
+        bytes(self.data), bytes(self.crc), 1,
+    )
+
+
+del _Cmd_
+del _ProtoChar_
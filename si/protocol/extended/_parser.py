@@ -0,0 +1,310 @@
+from si import exc as _exc_
+from si.protocol import ProtoChar as _ProtoChar_
+from si.protocol.extended import \
+    Cmd as _Cmd_, \
+    CrcState as _CrcState_, \
+    crc as _crc_, \
+    ExtendedFrame as _ExtendedFrame_, \
+    ExtendedRawInstruction as _ExtendedRawInstruction_
+
+
+_CMDS = {cmd.value[0]: cmd for cmd in _Cmd_}
+_STX = _ProtoChar_.STX.value
+_ETX = _ProtoChar_.ETX.value
+_WAKEUP = _ProtoChar_.WAKEUP.value
+_HANDSHAKES = {
+    c.value: c for c in (_ProtoChar_.ACK, _ProtoChar_.NAK)
+}
+_NOT_HANDSHAKES = bytes(
+    b for b in range(256) if b not in _HANDSHAKES
+)
+
+# parser states
+_SEEK, _LEN, _DATA, _CRC, _ETXSTATE = range(5)
+
+
+class ExtendedStreamParser:
+  """
+  Push parser of extended protocol instructions.
+
+  Bytes received from a stream should be passed to feed() in
+  chunks of any size. It returns the list of the
+  ExtendedRawInstruction.Parts of the instructions completed by
+  the chunk and keeps the state of the incomplete one. Every
+  byte is examined once; instruction data is copied in bulk and
+  the CRC is calculated incrementally as it arrives.
+
+  Invalid input raises si.exc.FrameError (si.exc.CRCError for
+  CRC mismatch) after consuming the offending byte, or the
+  whole instruction in case of CRC mismatch. The instructions
+  completed before the error are available as the frames
+  attribute of the exception and the rest of the chunk is kept
+  and gets parsed on the next feed() call.
+
+  With resync=True errors are not raised. Instead the parser
+  searches the buffered stream for the next STX followed by a
+  known command, length, valid CRC and ETX, and discards the
+  bytes before it in bulk. The total count of discarded bytes
+  is kept in the discarded attribute.
+
+  With handshake=True ACK and NAK bytes received outside of
+  instructions are returned as ProtoChar members in the list.
+
+  With compact=True ExtendedFrame objects are returned instead
+  of Parts. They refer to the received chunk if the instruction
+  is contained by a single one.
+
+  >>> parser = ExtendedStreamParser()
+  >>> parser.feed(b'\\xFF\\x02\\x02\\x83\\x02\\x00')
+  []
+  >>> parser.feed(b'\\x80\\xBF\\x17\\x03')  # doctest: +ELLIPSIS
+  [ExtendedRawInstructionParts(wakeup=1, stx=2, cmd=<Cmd.GET_SYSDATA: ...>, len=2, data=b'\\x00\\x80', crc=b'\\xbf\\x17', etx=1)]
+  >>> parser = ExtendedStreamParser(resync=True)
+  >>> frames = parser.feed(
+  ...     b'\\x02\\x83\\x02garbage'
+  ...     b'\\x02\\x83\\x02\\x00\\x80\\xBF\\x17\\x03'
+  ... )
+  >>> len(frames), parser.discarded
+  (1, 10)
+  >>> parser.feed(  # doctest: +ELLIPSIS
+  ...     b'\\x02\\x83\\xF0'
+  ...     b'\\xFF\\x02\\x02\\x83\\x02\\x00\\x80\\xBF\\x17\\x03'
+  ... )
+  [ExtendedRawInstructionParts(wakeup=1, stx=2, ...)]
+  """
+
+  Frame = _ExtendedFrame_
+  Parts = _ExtendedRawInstruction_.Parts
+
+  def __init__(self, *, check_crc=True, resync=False,
+      compact=False, handshake=False):
+    self.check_crc = check_crc
+    self.resync = resync
+    self.compact = compact
+    self.handshake = handshake
+    self.discarded = 0
+    self._backlog = b''
+    self.reset()
+  #keep _ExtendedRawInstruction_
+
+  @property
+  def in_frame(self):
+    "True if an instruction has been started but not completed."
+    return bool(self._stx or self._wakeup or self._buf)
+
+  def reset(self):
+    "Drop the incomplete instruction."
+    self._state = _SEEK
+    self._wakeup = 0
+    self._stx = 0
+    self._cmd = None
+    self._len = 0
+    self._data = bytearray()
+    self._crc = bytearray()
+    self._crcstate = None
+    self._cmdpos = None
+    self._buf = bytearray()
+
+  def feed(self, data):
+    "Parse data and return the list of completed instructions."
+    if self.resync:
+      return self._feed_resync(data)
+    if self._backlog:
+      data = self._backlog + bytes(data)
+      self._backlog = b''
+    elif self.compact and not isinstance(data, bytes):
+      data = bytes(data)
+    frames = []
+    i, n = 0, len(data)
+    while i < n:
+      state = self._state
+      if state == _DATA:
+        need = self._len - len(self._data)
+        chunk = data[i:i+need]
+        self._data += chunk
+        self._crcstate.update(chunk)
+        i += len(chunk)
+        if len(self._data) == self._len:
+          self._state = _CRC
+        continue
+      b = data[i]
+      i += 1
+      if state == _SEEK:
+        if b == _WAKEUP and not self._stx:
+          self._wakeup += 1
+        elif b == _STX:
+          self._stx += 1
+        elif (self.handshake and b in _HANDSHAKES
+            and not self._stx and not self._wakeup):
+          frames.append(_HANDSHAKES[b])
+        elif not self._stx:
+          self._fail(_exc_.FrameError(
+              'invalid instruction; STX missing'
+          ), frames, data, i)
+        elif b not in _CMDS:
+          self._fail(_exc_.FrameError(
+              f'invalid instruction; unknown command: {b:#04x}'
+          ), frames, data, i)
+        else:
+          self._cmd = _CMDS[b]
+          self._cmdpos = i - 1
+          self._crcstate = _CrcState_(bytes((b,)))
+          self._state = _LEN
+      elif state == _LEN:
+        self._len = b
+        self._crcstate.update(bytes((b,)))
+        self._state = (_DATA if b else _CRC)
+      elif state == _CRC:
+        self._crc.append(b)
+        if len(self._crc) == 2:
+          self._state = _ETXSTATE
+      else:
+        if b != _ETX:
+          self._fail(_exc_.FrameError(
+              'invalid instruction; ETX missing'
+          ), frames, data, i)
+        crc = bytes(self._crc)
+        if self.check_crc and crc != self._crcstate.digest():
+          self._fail(_exc_.CRCError(
+              f'CRC mismatch in {self._cmd.name} instruction'
+          ), frames, data, i)
+        if not self.compact:
+          frames.append(self.Parts(
+              self._wakeup, self._stx, self._cmd, self._len,
+              bytes(self._data), crc, 1,
+          ))
+        elif self._cmdpos is None:
+          frames.append(self.Frame.from_parts(self.Parts(
+              self._wakeup, self._stx, self._cmd, self._len,
+              bytes(self._data), crc, 1,
+          )))
+        else:
+          frames.append(self.Frame(data, self._cmdpos,
+              wakeup=self._wakeup, stx=self._stx))
+        self.reset()
+    # the incomplete instruction continues in the next chunk
+    self._cmdpos = None
+    return frames
+  #keep _CMDS
+  #keep _CrcState_
+  #keep _HANDSHAKES
+  #keep _ETX
+  #keep _exc_
+  #keep _STX
+  #keep _WAKEUP
+
+  def _feed_resync(self, data):
+    buf = self._buf
+    buf += data
+    frames = []
+    snapshot = None
+    i, n = 0, len(buf)
+    while i < n:
+      j = buf.find(_STX, i)
+      if j < 0:
+        # a trailing WAKEUP run may belong to the next instruction
+        k = len(buf.rstrip(bytes((_WAKEUP,))))
+        self._discard(buf, i, k, frames)
+        i = max(k, i)
+        break
+      w = j
+      while i < w and buf[w-1] == _WAKEUP:
+        w -= 1
+      end, k = self._candidate(buf, j, n)
+      if end is None:
+        # An incomplete candidate may be a glitch whose remaining
+        # bytes never arrive; a complete instruction after it
+        # takes precedence.
+        j = self._lookahead(buf, k, n)
+        if j < 0:
+          self._discard(buf, i, w, frames)
+          i = w
+          break
+        w = j
+        while k < w and buf[w-1] == _WAKEUP:
+          w -= 1
+        self._discard(buf, i, w, frames)
+        i = w
+        continue
+      if not end:
+        self._discard(buf, i, k, frames)
+        i = k
+        continue
+      self._discard(buf, i, w, frames)
+      crcpos = end - 3
+      if not self.compact:
+        frames.append(self.Parts(
+            j - w, k - j, _CMDS[buf[k]], buf[k+1],
+            bytes(buf[k+2:crcpos]), bytes(buf[crcpos:end-1]), 1,
+        ))
+      else:
+        if snapshot is None:
+          snapshot = bytes(buf)
+        frames.append(self.Frame(snapshot, k,
+            wakeup=j - w, stx=k - j))
+      i = end
+    del buf[:i]
+    return frames
+  #keep _CMDS
+  #keep _STX
+  #keep _WAKEUP
+
+  def _candidate(self, buf, j, n):
+    # Check the instruction candidate whose STX run starts at j.
+    # Return its end (0 if invalid, None if incomplete) and the
+    # index of its command byte.
+    k = j
+    while k < n and buf[k] == _STX:
+      k += 1
+    if n < k + 2:
+      return None, k
+    if buf[k] not in _CMDS:
+      return 0, k
+    crcpos = k + 2 + buf[k+1]
+    end = crcpos + 3
+    if n < end:
+      return None, k
+    if (buf[end-1] != _ETX
+        or self.check_crc
+        and buf[crcpos:crcpos+2] != _crc_(buf[k:crcpos])
+        ):
+      return 0, k
+    return end, k
+  #keep _CMDS
+  #keep _crc_
+  #keep _ETX
+  #keep _STX
+
+  def _lookahead(self, buf, k, n):
+    # Return the STX index of the first complete and valid
+    # instruction at or after k, or -1.
+    j = buf.find(_STX, k)
+    while 0 <= j:
+      end, k = self._candidate(buf, j, n)
+      if end:
+        return j
+      j = buf.find(_STX, k)
+    return -1
+  #keep _STX
+
+  def _discard(self, buf, i, j, frames):
+    if j <= i:
+      return
+    if self.handshake:
+      handshakes = buf[i:j].translate(None, _NOT_HANDSHAKES)
+      frames.extend(_HANDSHAKES[b] for b in handshakes)
+      self.discarded += j - i - len(handshakes)
+    else:
+      self.discarded += j - i
+  #keep _HANDSHAKES
+  #keep _NOT_HANDSHAKES
+
+  def _fail(self, exc, frames, data, i):
+    self._backlog = bytes(data[i:])
+    self.reset()
+    exc.frames = frames
+    raise exc
+
+
+del _Cmd_
+del _ProtoChar_
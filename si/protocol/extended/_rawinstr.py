@@ -129,15 +129,30 @@ class ExtendedRawInstruction(_BaseRawInstruction_):
   @classmethod
   @_Codec_.encodemethod
   def encode(cls, obj):
-    return bytes(
-        cls.WAKEUPByte.encode() * obj.wakeup
-        + cls.STXByte.encode() * obj.stx
-        + obj.cmd.value
-        + cls.LENByte.encode(obj.len)
-        + obj.data
-        + obj.crc
-        + cls.ETXByte.encode() * obj.etx
-      )
+    buffer = bytearray(cls.encoded_size(obj))
+    cls.encode_into(buffer, 0, obj)
+    return bytes(buffer)
+
+  @classmethod
+  def encode_into(cls, buffer, offset, obj):
+    i = offset
+    for _ in range(obj.wakeup):
+      i = cls.WAKEUPByte.encode_into(buffer, i)
+    for _ in range(obj.stx):
+      i = cls.STXByte.encode_into(buffer, i)
+    i = cls.CMDByte.encode_into(buffer, i, obj.cmd)
+    i = cls.LENByte.encode_into(buffer, i, obj.len)
+    buffer[i:i+obj.len] = obj.data
+    i += obj.len
+    buffer[i:i+2] = obj.crc
+    i += 2
+    for _ in range(obj.etx):
+      i = cls.ETXByte.encode_into(buffer, i)
+    return i
+
+  @classmethod
+  def encoded_size(cls, obj):
+    return obj.wakeup + obj.stx + 2 + obj.len + 2 + obj.etx
 
 
 codec = ExtendedRawInstruction
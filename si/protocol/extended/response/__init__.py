@@ -1,2 +1,5 @@
 __all__ = [
+  'get_sysdata',
 ]
+
+from . import get_sysdata
@@ -0,0 +1,32 @@
+from si.codec import Codec as _Codec_
+from si.codec import integer as _integer_
+
+
+# References:
+# PCPROG5
+# Response: 02 83 (LEN) (CN1 CN0) (ADR) (data) (CRC) 03
+class GetSysDataResponseCodec(_Codec_):
+
+  @classmethod
+  @_Codec_.decodemethod
+  def decode(cls, data):
+    assert 3 <= len(data)
+    cn = _integer_.Int16ub.decode(data[0:2])
+    adr = _integer_.Int8u.decode(data[2:3])
+    return {'cn': cn, 'adr': adr, 'data': bytes(data[3:])}
+  #keep _integer_
+
+  @classmethod
+  @_Codec_.encodemethod
+  def encode(cls, cn, adr, data):
+    assert adr + len(data) <= 128
+    b_cn = _integer_.Int16ub.encode(cn)
+    b_adr = _integer_.Int8u.encode(adr)
+    return b_cn + b_adr + bytes(data)
+  #keep _integer_
+
+
+codec = GetSysDataResponseCodec
+
+
+del _Codec_
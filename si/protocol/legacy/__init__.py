@@ -6,9 +6,12 @@ Cmd.__module__ = __name__
 from ._rawinstr import LegacyRawInstruction, \
   codec as rawinstr_codec
 LegacyRawInstruction.__module__ = __name__
+from ._parser import LegacyStreamParser
+LegacyStreamParser.__module__ = __name__
 from . import command
 from . import response
 
 
 del _common
+del _parser
 del _rawinstr
@@ -0,0 +1,115 @@
+from si import exc as _exc_
+from si.protocol import ProtoChar as _ProtoChar_
+from si.protocol.legacy import \
+    Cmd as _Cmd_, \
+    LegacyRawInstruction as _LegacyRawInstruction_
+from si.protocol.legacy._rawinstr import _BODY
+
+
+_CMDS = {cmd.value[0]: cmd for cmd in _Cmd_}
+_DLE = _ProtoChar_.DLE.value
+_STX = _ProtoChar_.STX.value
+_ETX = _ProtoChar_.ETX.value
+_WAKEUP = _ProtoChar_.WAKEUP.value
+_HANDSHAKES = {
+    c.value: c for c in (_ProtoChar_.ACK, _ProtoChar_.NAK)
+}
+
+
+class LegacyStreamParser:
+  """
+  Push parser of legacy protocol instructions.
+
+  It has the same feed() semantics as ExtendedStreamParser.
+  Escaped instruction data is scanned with a compiled regular
+  expression which resumes where the previous feed() stopped
+  and it gets unescaped in one step when the ETX arrives.
+  Handshake bytes are returned as with ExtendedStreamParser.
+
+  >>> parser = LegacyStreamParser()
+  >>> parser.feed(b'\\xFF\\x02\\x31\\x10\\x03')
+  []
+  >>> parser.feed(b'\\x10\\x10\\x03')  # doctest: +ELLIPSIS
+  [LegacyRawInstructionParts(wakeup=1, stx=1, cmd=<Cmd.CARD5_DATA_OLD: ...>, data=b'\\x03\\x10', etx=1)]
+  """
+
+  Parts = _LegacyRawInstruction_.Parts
+  DATABytes = _LegacyRawInstruction_.DATABytes
+
+  def __init__(self, *, handshake=False):
+    self.handshake = handshake
+    self._buf = bytearray()
+    self._scanpos = 0
+
+  @property
+  def in_frame(self):
+    "True if an instruction has been started but not completed."
+    return bool(self._buf)
+
+  def reset(self):
+    "Drop the incomplete instruction."
+    self._buf.clear()
+    self._scanpos = 0
+
+  def feed(self, data):
+    "Parse data and return the list of completed instructions."
+    buf = self._buf
+    buf += data
+    frames = []
+    i, n = 0, len(buf)
+    while i < n:
+      h = i
+      while h < n and buf[h] == _WAKEUP:
+        h += 1
+      s = h
+      while s < n and buf[s] == _STX:
+        s += 1
+      if s == n:
+        break
+      if (s == i and self.handshake and buf[s] in _HANDSHAKES):
+        frames.append(_HANDSHAKES[buf[s]])
+        i += 1
+        continue
+      if s == h:
+        self._fail(_exc_.FrameError(
+            'invalid instruction; STX missing'
+        ), frames, s + 1)
+      if buf[s] not in _CMDS:
+        self._fail(_exc_.FrameError(
+            f'invalid instruction; unknown command: {buf[s]:#04x}'
+        ), frames, s + 1)
+      e = _BODY.match(buf, max(s + 1, i + self._scanpos)).end()
+      if e == n or e + 1 == n and buf[e] == _DLE:
+        self._scanpos = e - i
+        break
+      if buf[e] != _ETX:
+        self._fail(_exc_.FrameError(
+            'invalid instruction; ETX missing'
+        ), frames, e + 1)
+      frames.append(self.Parts(
+          h - i, s - h, _CMDS[buf[s]],
+          self.DATABytes.decode(buf[s+1:e]), 1,
+      ))
+      self._scanpos = 0
+      i = e + 1
+    del buf[:i]
+    return frames
+  #keep _BODY
+  #keep _CMDS
+  #keep _DLE
+  #keep _ETX
+  #keep _exc_
+  #keep _HANDSHAKES
+  #keep _STX
+  #keep _WAKEUP
+
+  def _fail(self, exc, frames, i):
+    del self._buf[:i]
+    self._scanpos = 0
+    exc.frames = frames
+    raise exc
+
+
+del _Cmd_
+del _LegacyRawInstruction_
+del _ProtoChar_
@@ -1,11 +1,23 @@
 import collections as _collections_
+import re as _re_
 
+from si.codec import Codec as _Codec_
 from si.codec import enum as _enum_
 from si.protocol import \
-    BaseRawInstruction as _BaseRawInstruction_
+    BaseRawInstruction as _BaseRawInstruction_, \
+    ProtoChar as _ProtoChar_
 from si.protocol.legacy import Cmd as _Cmd_
 
 
+# Data characters 00-1F are prefixed with DLE. The body pattern
+# matches the escaped data up to the first unescaped control
+# character which is ETX in a valid instruction.
+_ESCAPE = _re_.compile(rb'[\x00-\x1F]')
+_UNESCAPE = _re_.compile(rb'\x10([\x00-\x1F])')
+_BODY = _re_.compile(rb'(?:[^\x00-\x1F]+|\x10[\x00-\x1F])*')
+_DLE = bytes((_ProtoChar_.DLE.value,))
+
+
 class LegacyRawInstruction(_BaseRawInstruction_):
 
   CMDByte = _enum_.EnumCodec.classfactory(
@@ -13,12 +25,72 @@ class LegacyRawInstruction(_BaseRawInstruction_):
     enum = _Cmd_,
   )
 
+  class DATABytes(_Codec_):
+
+    @classmethod
+    @_Codec_.decodemethod
+    def decode(cls, data):
+      data = bytes(data)
+      if _DLE not in data:
+        return data
+      return _UNESCAPE.sub(rb'\1', data)
+    #keep _DLE
+    #keep _UNESCAPE
+
+    @classmethod
+    @_Codec_.encodemethod
+    def encode(cls, data):
+      data = bytes(data)
+      if not _ESCAPE.search(data):
+        return data
+      return _ESCAPE.sub(_DLE + rb'\g<0>', data)
+    #keep _DLE
+    #keep _ESCAPE
+
   Parts = _collections_.namedtuple(
     'LegacyRawInstructionParts',
     ('wakeup', 'stx', 'cmd', 'data', 'etx')
   )
 
-  #TODO encode/decode methods
+  @classmethod
+  def make_obj(cls, cmd, data, *, wakeup=1, stx=1, etx=1):
+    assert 0 <= wakeup
+    assert 0 < stx
+    assert 1 == etx
+    cmd = cls.CMDByte.enum(cls.CMDByte.encode(cmd))
+    if data is None:
+      data = b''
+    else:
+      data = bytes(data)
+    return cls.Parts(wakeup, stx, cmd, data, etx)
+
+  @classmethod
+  @_Codec_.decodemethod
+  def decode(cls, data):
+    data = bytes(data)
+    h = len(data) - len(data.lstrip(cls.WAKEUPByte.data))
+    s = len(data) - len(data[h:].lstrip(cls.STXByte.data))
+    if s == h:
+      raise ValueError('invalid instruction; STX missing')
+    cmd = cls.CMDByte.decode(data[s:s+1])
+    e = _BODY.match(data, s + 1).end()
+    cls.ETXByte.decode(data[e:e+1])
+    if e + 1 < len(data):
+      raise ValueError('extra data')
+    return cls.Parts(h, s - h, cmd,
+        cls.DATABytes.decode(data[s+1:e]), 1)
+  #keep _BODY
+
+  @classmethod
+  @_Codec_.encodemethod
+  def encode(cls, obj):
+    return b''.join((
+        cls.WAKEUPByte.data * obj.wakeup,
+        cls.STXByte.data * obj.stx,
+        cls.CMDByte.encode(obj.cmd),
+        cls.DATABytes.encode(obj.data),
+        cls.ETXByte.data * obj.etx,
+    ))
 
 
 codec = LegacyRawInstruction
@@ -28,3 +100,5 @@ del _BaseRawInstruction_
 del _Cmd_
 del _collections_
 del _enum_
+del _ProtoChar_
+del _re_
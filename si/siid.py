@@ -3,6 +3,34 @@ import typing as _typing_
 from . import common as _common_
 
 
+_CT = _common_.CardType
+CARD_TYPE_RANGES = (
+    # References:
+    # Helper.cs 9e291aa (#L735-L816)
+    (1, 65000, _CT.Card5),
+    (200001, 265000, _CT.Card5),
+    (300001, 365000, _CT.Card5),
+    (400001, 465000, _CT.Card5),
+    (500000, 999999, _CT.Card6),
+    (1000000, 1999999, _CT.Card9),
+    (2000000, 2799999, _CT.Card8),
+    (2800000, 2999999, _CT.ComCardUp),
+    (3000000, 3999999, _CT.Card5),
+    (4000000, 4999999, _CT.PCard),
+    (5373953, 5438952, _CT.Card_5R),
+    (5570561, 5635560, _CT.Card_5U),
+    (6000000, 6999999, _CT.TCard),
+    (7000000, 7999999, _CT.Card10),
+    (8000000, 8999999, _CT.ActiveCard),
+    (9000000, 9999999, _CT.Card11),
+    (14000000, 14999999, _CT.FCard),
+    (16771680, 16777214, _CT.Card6),
+    (16777215, 16777215, _CT.ActiveCard),
+)
+"(first, last, CardType) SIID ranges in order of precedence"
+del _CT
+
+
 def get_card_family_from_siid(
     siid: _typing_.Union[str, int]
   ) -> _common_.CardFamily:
@@ -17,6 +45,14 @@ def get_card_family_from_siid(
 #keep _common_
 
 
+def get_siid_ranges(cardtype: _common_.CardType) -> tuple:
+  "Return the (first, last) SIID ranges of the card type."
+  return tuple(
+      (first, last) for first, last, cardtype_ in CARD_TYPE_RANGES
+      if cardtype_ is cardtype
+  )
+
+
 def get_card_type_from_siid(
     siid: _typing_.Union[str, int]
   ) -> _common_.CardType:
@@ -26,52 +62,45 @@ def get_card_type_from_siid(
   """
   # References:
   # Helper.cs 9e291aa (#L735-L816)
-  cardtype = _common_.CardType
   try:
     siid = int(siid)
   except ValueError:
-    return cardtype.NotSet
-  if (1 <= siid <= 65000):
-    return cardtype.Card5
-  elif (200001 <= siid <= 265000):
-    return cardtype.Card5
-  elif (300001 <= siid <= 365000):
-    return cardtype.Card5
-  elif (400001 <= siid <= 465000):
-    return cardtype.Card5
-  elif (500000 <= siid <= 999999):
-    return cardtype.Card6
-  elif (1000000 <= siid <= 1999999):
-    return cardtype.Card9
-  elif (2000000 <= siid <= 2799999):
-    return cardtype.Card8
-  elif (2800000 <= siid <= 2999999):
-    return cardtype.ComCardUp
-  elif (3000000 <= siid <= 3999999):
-    return cardtype.Card5
-  elif (4000000 <= siid <= 4999999):
-    return cardtype.PCard
-  elif (5373953 <= siid <= 5438952):
-    return cardtype.Card_5R
-  elif (5570561 <= siid <= 5635560):
-    return cardtype.Card_5U
-  elif (6000000 <= siid <= 6999999):
-    return cardtype.TCard
-  elif (7000000 <= siid <= 7999999):
-    return cardtype.Card10
-  elif (8000000 <= siid <= 8999999):
-    return cardtype.ActiveCard
-  elif (9000000 <= siid <= 9999999):
-    return cardtype.Card11
-  elif (14000000 <= siid <= 14999999):
-    return cardtype.FCard
-  elif (16771680 <= siid <= 16777214):
-    return cardtype.Card6
-  elif siid == 16777215:
-    return cardtype.ActiveCard
-  else:
-    return cardtype.NotSet
+    return _common_.CardType.NotSet
+  for first, last, cardtype in CARD_TYPE_RANGES:
+    if first <= siid <= last:
+      return cardtype
+  return _common_.CardType.NotSet
 #keep _common_
 
 
+def get_bytes_from_siid(siid: _typing_.Union[str, int]) -> bytes:
+  "Return the SI3 SI2 SI1 SI0 bytes of the SIID."
+  # References:
+  # PCPROG5
+  siid = int(siid)
+  if (get_card_type_from_siid(siid) is _common_.CardType.Card5
+      and 65000 < siid < 500000):
+    # SI-card 5 with series: SI2 is the series
+    series, number = divmod(siid, 100000)
+    return bytes((0, series)) + number.to_bytes(2, 'big')
+  return siid.to_bytes(4, 'big')
+#keep _common_
+
+
+def get_siid_from_bytes(data: bytes) -> int:
+  "Return the SIID of the SI3 SI2 SI1 SI0 bytes."
+  # References:
+  # PCPROG5
+  # sireader.py 9535938 (#L1185-L1198)
+  if data[0] == 0:
+    number = int.from_bytes(data[1:4], 'big')
+    if number < 500000:
+      # SI-card 5: SI2 is the series, shown from series 2 on
+      number = int.from_bytes(data[2:4], 'big')
+      if 2 <= data[1]:
+        number += data[1] * 100000
+      return number
+  return int.from_bytes(data[0:4], 'big')
+
+
 del _typing_
@@ -0,0 +1,29 @@
+__all__ = [
+    'capture',
+    'loadgen',
+    'server',
+    'simulator',
+    ]
+
+from ._serial import configure, open_serial, SerialTransport
+configure.__module__ = __name__
+open_serial.__module__ = __name__
+SerialTransport.__module__ = __name__
+from ._policy import RetryPolicy
+RetryPolicy.__module__ = __name__
+from ._client import Request, StationClient
+Request.__module__ = __name__
+StationClient.__module__ = __name__
+from ._manager import \
+    decode_event, EventKind, StationEvent, StationManager
+decode_event.__module__ = __name__
+EventKind.__module__ = __name__
+StationEvent.__module__ = __name__
+StationManager.__module__ = __name__
+from . import capture
+
+
+del _client
+del _manager
+del _policy
+del _serial
@@ -0,0 +1,561 @@
+import asyncio as _asyncio_
+import collections as _collections_
+
+from si import common as _common_
+from si import exc as _exc_
+from si import siid as _siid_
+from si.protocol import \
+    FrameCache as _FrameCache_, \
+    Mode as _Mode_, \
+    ProtoChar as _ProtoChar_, \
+    StreamParser as _StreamParser_
+from si.protocol import legacy as _legacy_
+from si.protocol.extended import Cmd as _Cmd_
+from si.protocol.extended.command import \
+    get_sysdata as _get_sysdata_
+from si.protocol.extended.response import \
+    get_sysdata as _get_sysdata_response_
+from si.product import \
+    ProductFamily as _ProductFamily_, \
+    SysAddr as _SysAddr_
+from si.product import memory as _memory_
+from si.station import open_serial as _open_serial_
+from si.station import RetryPolicy as _RetryPolicy_
+
+
+_CARD5_TYPES = frozenset((
+    _common_.CardType.Card5,
+    _common_.CardType.Card_5U,
+    _common_.CardType.Card_5R,
+))
+
+
+class Request:
+  "An outstanding request of a StationClient"
+
+  __slots__ = (
+      'cmd', 'data', 'future', 'attempt', 'transfer_time',
+      'timeout',
+  )
+
+  def __init__(self, cmd, data, future, attempt=0):
+    self.cmd = cmd
+    self.data = data
+    self.future = future
+    self.attempt = attempt
+    self.transfer_time = 0.0
+    self.timeout = None
+
+  def __repr__(self):
+    return (f'<{self.__class__.__name__} {self.cmd.name}'
+        f' attempt={self.attempt}>')
+
+
+class StationClient(_asyncio_.Protocol):
+  """
+  asyncio protocol of a SPORTident station
+
+  Commands are sent with a WAKEUP byte and two STX bytes and the
+  responses are matched to the requests by their command code.
+  Received instructions not answering a request (like card
+  insertion and punch records) are passed to the on_event
+  callable if set, otherwise they are put into the events queue.
+
+  Requests are pipelined: up to max_outstanding of them are sent
+  without waiting for the responses. Responses with the same
+  command code are matched in FIFO order. A NAK is assigned to
+  the oldest outstanding request. A request which is NAKed or
+  times out is resent up to retries times without affecting the
+  other outstanding requests. Timeouts and retry delays are
+  given by the policy (a RetryPolicy) from the line speed,
+  the expected response length and the requests queued ahead
+  unless the timeout attribute is set.
+
+  Responses of the commands in echoes are only matched to a
+  request whose parameters they echo (like the address of
+  GET_SYSDATA); a response matching none of the outstanding
+  requests is a late one of a timed out request and it is
+  dropped and counted as 'stale' by the policy. Note that a
+  lost response of other commands makes the later responses
+  with the same command code match the preceding requests until
+  the lost one times out.
+
+  Use the open() coroutine to connect to a serial device.
+  """
+
+  timeout = None
+  "Fixed seconds to wait for a response instead of the policy"
+
+  retries = 2
+  "Default number of resends after a NAK or timeout"
+
+  baudrates = (38400, 4800)
+  "Line speeds to probe in order of preference"
+
+  high_speed_families = frozenset((
+      _ProductFamily_.SimSrr,
+      _ProductFamily_.Bs8SiMaster,
+      _ProductFamily_.Bs10UfoReaderSiGolf,
+      _ProductFamily_.Bs10UfoReaderSportIdent,
+      _ProductFamily_.Bsx6,
+      _ProductFamily_.Bsx7,
+      _ProductFamily_.Bsx8,
+      _ProductFamily_.Bs11LoopAntenna,
+      _ProductFamily_.Bs11Large,
+      _ProductFamily_.Bs11Small,
+      _ProductFamily_.Bs12GsmUart,
+      _ProductFamily_.SiGsmDn,
+      _ProductFamily_.SiPoint,
+  ))
+  "Product families known to support 38400 baud"
+
+  echoes = {
+      # References:
+      # PCPROG5
+      # 02 81 04 ADR2 ADR1 ADR0 NUM CRC1 CRC0 03
+      # 02 81 LEN CN1 CN0 ADR2 ADR1 ADR0 (data) CRC1 CRC0 03
+      _Cmd_.READ_BACKUP: (slice(0, 3), slice(2, 5)),
+      # 02 82 LEN ADR (data) CRC1 CRC0 03
+      # 02 82 03 CN1 CN0 ADR CRC1 CRC0 03
+      _Cmd_.SET_SYSDATA: (slice(0, 1), slice(2, 3)),
+      # 02 83 02 ADR NUM CRC1 CRC0 03
+      # 02 83 LEN CN1 CN0 ADR (data) CRC1 CRC0 03
+      _Cmd_.GET_SYSDATA: (slice(0, 1), slice(2, 3)),
+      # 02 E1 01 BN CRC1 CRC0 03
+      # 02 E1 83 CN1 CN0 BN (128 bytes) CRC1 CRC0 03
+      _Cmd_.CARD6_DATA: (slice(0, 1), slice(2, 3)),
+      # 02 EF 01 BN CRC1 CRC0 03
+      # 02 EF 83 CN1 CN0 BN (128 bytes) CRC1 CRC0 03
+      _Cmd_.READ_CARDX_BLOCK: (slice(0, 1), slice(2, 3)),
+      # 02 73 ADR NUM 03
+      # 02 73 CN ADR (data) 03
+      _legacy_.Cmd.GET_SDATA_OLD: (slice(0, 1), slice(1, 2)),
+  }
+  """
+  (request slice, response slice) of the data of the commands
+  whose responses echo request parameters
+  """
+
+  card_blocks = {
+      # References:
+      # PCPROG5
+      _common_.CardType.Card6: (0, 6, 7),
+      _common_.CardType.Card8: (0, 1),
+      _common_.CardType.Card9: (0, 1),
+      _common_.CardType.PCard: (0, 1),
+      _common_.CardType.Card10: (0, 4, 5, 6, 7),
+      _common_.CardType.Card11: (0, 4, 5, 6, 7),
+      _common_.CardType.ActiveCard: (0, 4, 5, 6, 7),
+  }
+  """
+  Blocks read of the card types read by blocks; other cards
+  than SI-card 5 get their blocks 0 and 1 read
+  """
+
+  def __init__(self, *, mode=_Mode_.NotSet, framecache=None,
+      max_outstanding=8, policy=None):
+    self.parser = _StreamParser_(mode, resync=True,
+        handshake=True)
+    self._mode = self.parser.mode
+    if framecache is None:
+      framecache = _FrameCache_(wakeup=1, stx=2)
+    self.framecache = framecache
+    self.max_outstanding = max_outstanding
+    if policy is None:
+      policy = _RetryPolicy_()
+    self.policy = policy
+    self.events = _asyncio_.Queue()
+    self.on_event = None
+    self.serial_number = None
+    self.transport = None
+    self._slots = _asyncio_.Semaphore(max_outstanding)
+    self._pending = {}
+    self._order = _collections_.deque()
+    self._closed = None
+  #keep _asyncio_
+  #keep _collections_
+  #keep _FrameCache_
+  #keep _RetryPolicy_
+  #keep _StreamParser_
+
+  @classmethod
+  async def open(cls, path, baudrate=38400, *, negotiate=False,
+      **kwargs):
+    """
+    Open the serial device at path and return the client.
+
+    If negotiate is true, the line speed is negotiated before
+    returning; starting with baudrate.
+    """
+    _, client = await _open_serial_(
+        lambda: cls(**kwargs), path, baudrate
+    )
+    if negotiate:
+      baudrates = (baudrate,) + tuple(
+          b for b in client.baudrates if b != baudrate
+      )
+      try:
+        await client.negotiate(baudrates)
+      except BaseException:
+        client.close()
+        raise
+    return client
+  #keep _open_serial_
+
+  @property
+  def baudrate(self):
+    return getattr(self.transport, 'baudrate', None)
+
+  @property
+  def mode(self):
+    return self.parser.mode
+
+  @property
+  def outstanding(self):
+    "Number of requests waiting for response."
+    return len(self._order)
+
+  def connection_made(self, transport):
+    loop = _asyncio_.get_running_loop()
+    self.transport = transport
+    self._closed = loop.create_future()
+  #keep _asyncio_
+
+  def data_received(self, data):
+    # After an error the parser keeps the rest of the bytes for
+    # the next feed(), so it is fed again until all are parsed.
+    while True:
+      try:
+        frames = self.parser.feed(data)
+        failed = False
+      except ValueError as e:
+        frames = e.frames
+        failed = True
+      for frame in frames:
+        if isinstance(frame, _ProtoChar_):
+          self.handshake_received(frame)
+        else:
+          self.frame_received(frame)
+      if not failed:
+        return
+      data = b''
+  #keep _ProtoChar_
+
+  def handshake_received(self, char):
+    if char is _ProtoChar_.NAK and self._order:
+      request = self._order[0]
+      self._withdraw(request)
+      if not request.future.done():
+        request.future.set_exception(
+            _exc_.NAKError(f'{request.cmd.name} NAKed')
+        )
+    else:
+      self.event_received(char)
+  #keep _exc_
+  #keep _ProtoChar_
+
+  def frame_received(self, frame):
+    queue = self._pending.get(frame.cmd)
+    if not queue:
+      self.event_received(frame)
+      return
+    request = self._match(queue, frame)
+    if request is None:
+      self.policy.count(frame.cmd, 'stale')
+      return
+    self._withdraw(request)
+    if not request.future.done():
+      request.future.set_result(frame)
+
+  def _match(self, queue, frame):
+    echo = self.echoes.get(frame.cmd)
+    if echo is None:
+      return queue[0]
+    request_slice, response_slice = echo
+    echoed = frame.data[response_slice]
+    for request in queue:
+      if request.data[request_slice] == echoed:
+        return request
+    return None
+
+  def event_received(self, event):
+    if self.on_event is None:
+      self.events.put_nowait(event)
+    else:
+      self.on_event(event)
+
+  def connection_lost(self, exc):
+    order, self._order = self._order, _collections_.deque()
+    self._pending = {}
+    for request in order:
+      if not request.future.done():
+        request.future.set_exception(
+            ConnectionError('connection lost')
+        )
+    if not self._closed.done():
+      self._closed.set_result(exc)
+  #keep _collections_
+
+  def send(self, cmd, data=b''):
+    "Send the instruction without waiting for a response."
+    if self.transport is None or self.transport.is_closing():
+      raise ConnectionError('not connected')
+    self.transport.write(self.framecache.get(cmd, data))
+
+  def _submit(self, cmd, data, attempt, timeout):
+    loop = _asyncio_.get_running_loop()
+    request = Request(cmd, data, loop.create_future(), attempt)
+    baudrate = self.baudrate
+    if baudrate:
+      request.transfer_time = self.policy.transfer_time(
+          cmd, data, baudrate
+      )
+    if timeout is None:
+      ahead = sum(r.transfer_time for r in self._order)
+      timeout = self.policy.timeout(
+          cmd, data, baudrate or 38400, ahead=ahead
+      )
+    request.timeout = timeout
+    self._pending.setdefault(cmd, _collections_.deque()).append(
+        request
+    )
+    self._order.append(request)
+    try:
+      self.send(cmd, data)
+    except BaseException:
+      self._withdraw(request)
+      raise
+    return request
+  #keep _asyncio_
+  #keep _collections_
+
+  def _withdraw(self, request):
+    queue = self._pending.get(request.cmd)
+    if queue is not None:
+      try:
+        queue.remove(request)
+      except ValueError:
+        pass
+      if not queue:
+        del self._pending[request.cmd]
+    try:
+      self._order.remove(request)
+    except ValueError:
+      pass
+
+  async def request(self, cmd, data=b'', *, timeout=None,
+      retries=None):
+    """
+    Send the instruction and return the response
+
+    Raises asyncio.TimeoutError or si.exc.NAKError if the last
+    attempt gets no response in timeout (or the timeout
+    attribute or the policy's) seconds or it gets NAKed.
+    """
+    data = bytes(data)
+    if timeout is None:
+      timeout = self.timeout
+    if retries is None:
+      retries = self.retries
+    policy = self.policy
+    policy.count(cmd, 'request')
+    async with self._slots:
+      for attempt in range(retries + 1):
+        if attempt:
+          policy.count(cmd, 'retry')
+          await _asyncio_.sleep(policy.backoff(attempt))
+        policy.count(cmd, 'attempt')
+        request = self._submit(cmd, data, attempt, timeout)
+        try:
+          response = await _asyncio_.wait_for(
+              request.future, request.timeout
+          )
+        except (_asyncio_.TimeoutError, _exc_.NAKError) as e:
+          nak = isinstance(e, _exc_.NAKError)
+          policy.count(cmd, ('nak' if nak else 'timeout'))
+          if retries <= attempt:
+            policy.count(cmd, 'failure')
+            raise
+        else:
+          policy.count(cmd, 'success')
+          return response
+        finally:
+          self._withdraw(request)
+  #keep _asyncio_
+  #keep _exc_
+
+  async def request_many(self, requests, **kwargs):
+    """
+    Pipeline (cmd, data) requests and return the responses
+
+    The responses are returned in the order of requests.
+    """
+    return await _asyncio_.gather(*(
+        self.request(cmd, data, **kwargs)
+        for cmd, data in requests
+    ))
+  #keep _asyncio_
+
+  async def get_sysdata(self, adr=0, anz=128, **kwargs):
+    """
+    Read anz bytes of the system data from adr with GET_SYSDATA
+    or GET_SDATA_OLD in legacy mode.
+    """
+    data = _get_sysdata_.codec.encode(adr, anz)
+    if self.mode is _Mode_.Legacy:
+      cmd = _legacy_.Cmd.GET_SDATA_OLD
+    else:
+      cmd = _Cmd_.GET_SYSDATA
+    return await self.request(cmd, data, **kwargs)
+  #keep _Cmd_
+  #keep _get_sysdata_
+  #keep _legacy_
+  #keep _Mode_
+
+  async def read_sysdata(self, adr=0, anz=128, *, memory=None,
+      **kwargs):
+    """
+    Read anz bytes of the system data from adr into memory and
+    return it. A new SysDataMemory is created if memory is None.
+    """
+    if memory is None:
+      memory = _memory_.SysDataMemory(bytearray(128))
+    frame = await self.get_sysdata(adr, anz, **kwargs)
+    if frame.cmd is _legacy_.Cmd.GET_SDATA_OLD:
+      # one byte CN
+      i, values = frame.data[1], frame.data[2:]
+    else:
+      response = _get_sysdata_response_.codec.decode(frame.data)
+      i, values = response['adr'], response['data']
+    memory[i:i+len(values)] = values
+    return memory
+  #keep _get_sysdata_response_
+  #keep _legacy_
+  #keep _memory_
+
+  def readout_requests(self, siid):
+    "Return the (cmd, data) requests reading the card siid."
+    cardtype = _siid_.get_card_type_from_siid(siid)
+    if cardtype in _CARD5_TYPES:
+      return [(_Cmd_.CARD5_DATA, b'')]
+    if cardtype is _common_.CardType.Card6:
+      cmd = _Cmd_.CARD6_DATA
+    else:
+      cmd = _Cmd_.READ_CARDX_BLOCK
+    blocks = self.card_blocks.get(cardtype, (0, 1))
+    return [(cmd, bytes((block,))) for block in blocks]
+  #keep _CARD5_TYPES
+  #keep _Cmd_
+  #keep _common_
+  #keep _siid_
+
+  async def read_card(self, siid, **kwargs):
+    """
+    Read the card siid inserted into the station and return the
+    response frames of its blocks.
+    """
+    return await self.request_many(
+        self.readout_requests(siid), **kwargs
+    )
+
+  def _set_baudrate(self, baudrate):
+    if self.transport.baudrate != baudrate:
+      self.transport.set_baudrate(baudrate)
+      # bytes received on the old line speed are garbage; the
+      # protocol mode stays
+      if self.parser.parser is None:
+        self.parser.reset()
+      else:
+        self.parser.parser.reset()
+
+  async def probe(self, baudrates=None, **kwargs):
+    """
+    Find the line speed and protocol mode the station answers on
+
+    The station's system data is read from BN3 to CFG0 on each
+    of baudrates (or the baudrates attribute) until it answers.
+    If the mode was not given to the constructor, extended mode
+    is tried first (unless a previous probe found legacy mode),
+    then legacy mode, and the mode of the answer is kept. The
+    read SysDataMemory is returned.
+    """
+    if self._mode is _Mode_.NotSet:
+      # the mode found by a previous probe first
+      modes = sorted((_Mode_.Extended, _Mode_.Legacy),
+          key=lambda mode: mode is not self.mode)
+    else:
+      modes = (self._mode,)
+    for baudrate in (baudrates or self.baudrates):
+      self._set_baudrate(baudrate)
+      for mode in modes:
+        if self.mode is not mode:
+          self.parser.mode = mode
+        try:
+          return await self.read_sysdata(0, _SysAddr_.CFG0 + 1,
+              **kwargs)
+        except (_asyncio_.TimeoutError, _exc_.NAKError):
+          pass
+    self.parser.mode = self._mode
+    raise ConnectionError('station does not respond')
+  #keep _exc_
+  #keep _Mode_
+  #keep _SysAddr_
+
+  def supports_baudrate(self, memory, baudrate):
+    "Return True if the station of memory supports baudrate."
+    if baudrate <= 4800:
+      return True
+    return memory['ProductFamily'] in self.high_speed_families
+
+  async def set_station_baudrate(self, baudrate, **kwargs):
+    """
+    Switch the station and the port to baudrate
+
+    SET_BAUD or SET_BAUD_OLD in legacy mode is sent. The
+    response might arrive on either line speed so a missing
+    response is tolerated.
+    """
+    param = {4800: b'\x00', 38400: b'\x01'}[baudrate]
+    if self.mode is _Mode_.Legacy:
+      cmd = _legacy_.Cmd.SET_BAUD_OLD
+    else:
+      cmd = _Cmd_.SET_BAUD
+    kwargs.setdefault('retries', 0)
+    try:
+      await self.request(cmd, param, **kwargs)
+    except _asyncio_.TimeoutError:
+      pass
+    self._set_baudrate(baudrate)
+  #keep _Cmd_
+  #keep _legacy_
+  #keep _Mode_
+
+  async def negotiate(self, baudrates=None, *, upgrade=True):
+    """
+    Probe the line speed and upgrade it to the fastest of
+    baudrates (or the baudrates attribute) the product supports.
+
+    The SysDataMemory (BN3 to CFG0) is returned.
+    """
+    baudrates = baudrates or self.baudrates
+    memory = await self.probe(baudrates)
+    current = self.baudrate
+    for baudrate in sorted(baudrates, reverse=True):
+      if baudrate <= current or not upgrade:
+        break
+      if not self.supports_baudrate(memory, baudrate):
+        continue
+      try:
+        await self.set_station_baudrate(baudrate)
+        return await self.probe((baudrate,))
+      except (ConnectionError, _exc_.NAKError):
+        self._set_baudrate(current)
+    return memory
+  #keep _exc_
+
+  def close(self):
+    if self.transport is not None:
+      self.transport.close()
+
+  async def wait_closed(self):
+    await self._closed
@@ -0,0 +1,262 @@
+import asyncio as _asyncio_
+import collections as _collections_
+import enum as _enum_
+
+from si import exc as _exc_
+from si import siid as _siid_
+from si.codec import time as _time_
+from si.protocol import ProtoChar as _ProtoChar_
+from si.protocol import extended as _extended_
+from si.protocol import legacy as _legacy_
+from si.station import StationClient as _StationClient_
+
+
+class EventKind(_enum_.Enum):
+  "Kind of a StationEvent"
+  Other = 0
+  Handshake = 1
+  CardIn = 2
+  CardOut = 3
+  Punch = 4
+  Readout = 5
+
+
+StationEvent = _collections_.namedtuple(
+    'StationEvent',
+    ('serial_number', 'event', 'kind', 'cn', 'siid', 'time'),
+    defaults=(EventKind.Other, None, None, None),
+)
+"""
+Decoded event of a station: the received frame (or ProtoChar)
+as event, its EventKind, the station code (cn), the card number
+(siid) and the punch time (a datetime.time) when present
+"""
+
+_ExtCmd = _extended_.Cmd
+_LegCmd = _legacy_.Cmd
+_KINDS = {
+    # References:
+    # PCPROG5
+    _ExtCmd.CARD5_IN: EventKind.CardIn,
+    _ExtCmd.CARD6_IN: EventKind.CardIn,
+    _ExtCmd.CARD_CARD_X_IN: EventKind.CardIn,
+    _ExtCmd.CARD_OUT: EventKind.CardOut,
+    _ExtCmd.PUNCH_TRIGGER: EventKind.Punch,
+    _ExtCmd.CARD5_DATA: EventKind.Readout,
+    _ExtCmd.CARD6_DATA: EventKind.Readout,
+    _ExtCmd.READ_CARDX_BLOCK: EventKind.Readout,
+    _LegCmd.CARD_MOVE_OLD: EventKind.CardIn,
+    _LegCmd.BY2_CARD5_OLD: EventKind.CardIn,
+    _LegCmd.SERIES_R_CARD5: EventKind.CardIn,
+    _LegCmd.SERIES_U_CARD5: EventKind.CardIn,
+    _LegCmd.BY2_CARD_OUT_OLD: EventKind.CardOut,
+    _LegCmd.PUNCH_TRIGGER_OLD: EventKind.Punch,
+    _LegCmd.PUNCH_TRIGGER_VERYOLD: EventKind.Punch,
+    _LegCmd.CARD5_DATA_OLD: EventKind.Readout,
+    _LegCmd.CARD6_DATA_OLD: EventKind.Readout,
+}
+del _ExtCmd
+del _LegCmd
+_ExtendedParts = _extended_.ExtendedRawInstruction.Parts
+_SIID_KINDS = frozenset((
+    EventKind.CardIn, EventKind.CardOut, EventKind.Punch,
+))
+
+
+def decode_event(serial_number, event):
+  """
+  Return the StationEvent of a frame received from the station
+  of serial_number.
+
+  The station code, the card number and the punch time are
+  decoded from extended protocol frames; legacy ones get their
+  kind only.
+  """
+  if isinstance(event, _ProtoChar_):
+    return StationEvent(serial_number, event, EventKind.Handshake)
+  kind = _KINDS.get(event.cmd, EventKind.Other)
+  if not isinstance(event, _ExtendedParts):
+    return StationEvent(serial_number, event, kind)
+  # References:
+  # PCPROG5
+  # E5/E6/E7/E8: CN1 CN0 SI3 SI2 SI1 SI0
+  # D3: CN1 CN0 SI3 SI2 SI1 SI0 TD TH TL TSS MEM2 MEM1 MEM0
+  data = event.data
+  cn = siid = time = None
+  if 2 <= len(data):
+    cn = int.from_bytes(data[0:2], 'big')
+  if kind in _SIID_KINDS and 6 <= len(data):
+    siid = _siid_.get_siid_from_bytes(data[2:6]) or None
+  if kind is EventKind.Punch and 10 <= len(data):
+    time = _time_.PunchTimeCodec.decode(data[6:10])
+  return StationEvent(serial_number, event, kind, cn, siid, time)
+#keep _ExtendedParts
+#keep _KINDS
+#keep _SIID_KINDS
+#keep _ProtoChar_
+#keep _siid_
+#keep _time_
+
+
+class StationManager:
+  """
+  Owner of many station connections on one event loop
+
+  Stations are added by their device path and identified by
+  their serial number (SysDataMemory['SerialNumber']) read on
+  connection. The events of all stations are merged into one
+  queue as StationEvent tuples decoded by decode_event();
+  iterate the manager with async for to receive them.
+
+  Each client is an asyncio protocol driven by the readiness of
+  its file descriptor, and it passes its events directly to the
+  merged queue. No task polls the ports, so an idle station
+  costs nothing and the latency of one port does not grow with
+  the number of ports.
+
+  The line speed is negotiated on each connection with the
+  StationClient.negotiate() method. The resulting baud rate
+  is remembered per serial number in the baudrates attribute and
+  tried first on the next connection of the same device path.
+
+  If readout is true, the card inserted into a station is read
+  with StationClient.read_card() and the response frames of its
+  blocks are put into the queue as Readout events after the
+  CardIn event. Failed readouts are counted in the
+  readout_failures attribute.
+
+  If maxsize is given and the queue is full the oldest event is
+  dropped and counted in the dropped attribute.
+  """
+
+  client_class = _StationClient_
+
+  def __init__(self, *, maxsize=0, readout=False):
+    self.readout = readout
+    self.stations = {}
+    self.baudrates = {}
+    self._path_serial_numbers = {}
+    self.events = _asyncio_.Queue(maxsize)
+    self.dropped = 0
+    self.readout_failures = 0
+    self._closing = False
+    self._watchers = set()
+  #keep _asyncio_
+  #keep _StationClient_
+
+  def __len__(self):
+    return len(self.stations)
+
+  def __getitem__(self, serial_number):
+    return self.stations[serial_number]
+
+  def __aiter__(self):
+    return self
+
+  async def __anext__(self):
+    if self._closing and self.events.empty():
+      raise StopAsyncIteration
+    event = await self.events.get()
+    if event is None:
+      raise StopAsyncIteration
+    return event
+
+  async def add(self, path, baudrate=None, *, upgrade=True,
+      **kwargs):
+    "Connect the station at path and return its serial number."
+    if baudrate is None:
+      baudrate = self.baudrates.get(
+          self._path_serial_numbers.get(path), 38400
+      )
+    client = await self.client_class.open(
+        path, baudrate, **kwargs
+    )
+    baudrates = (baudrate,) + tuple(
+        b for b in client.baudrates if b != baudrate
+    )
+    try:
+      memory = await client.negotiate(baudrates, upgrade=upgrade)
+      serial_number = memory['SerialNumber']
+    except BaseException:
+      client.close()
+      raise
+    self.baudrates[serial_number] = client.baudrate
+    self._path_serial_numbers[path] = serial_number
+    old = self.stations.get(serial_number)
+    if old is not None:
+      old.close()
+    self.stations[serial_number] = client
+    client.serial_number = serial_number
+    while not client.events.empty():
+      self._on_event(client, client.events.get_nowait())
+    client.on_event = lambda event: self._on_event(client, event)
+    watcher = _asyncio_.ensure_future(
+        self._watch(serial_number, client)
+    )
+    self._watchers.add(watcher)
+    watcher.add_done_callback(self._watchers.discard)
+    return serial_number
+  #keep _asyncio_
+
+  async def add_many(self, paths, **kwargs):
+    """
+    Connect the stations at paths concurrently and return their
+    serial numbers or exceptions in the order of paths.
+    """
+    return await _asyncio_.gather(
+        *(self.add(path, **kwargs) for path in paths),
+        return_exceptions=True,
+    )
+  #keep _asyncio_
+
+  async def _watch(self, serial_number, client):
+    await client.wait_closed()
+    if self.stations.get(serial_number) is client:
+      del self.stations[serial_number]
+
+  def _on_event(self, client, frame):
+    event = decode_event(client.serial_number, frame)
+    self._put(event)
+    if (self.readout and event.kind is EventKind.CardIn
+        and event.siid is not None):
+      task = _asyncio_.ensure_future(
+          self._read_card(client, event.siid)
+      )
+      self._watchers.add(task)
+      task.add_done_callback(self._watchers.discard)
+  #keep _asyncio_
+
+  async def _read_card(self, client, siid):
+    try:
+      frames = await client.read_card(siid)
+    except (_asyncio_.TimeoutError, ConnectionError,
+        _exc_.NAKError):
+      self.readout_failures += 1
+      return
+    for frame in frames:
+      self._put(decode_event(client.serial_number, frame))
+  #keep _asyncio_
+  #keep _exc_
+
+  def _put(self, event):
+    events = self.events
+    if events.full():
+      events.get_nowait()
+      self.dropped += 1
+    events.put_nowait(event)
+
+  def remove(self, serial_number):
+    "Close the connection of the station."
+    self.stations.pop(serial_number).close()
+
+  async def close(self):
+    "Close all connections and end the event iteration."
+    self._closing = True
+    clients = list(self.stations.values())
+    for client in clients:
+      client.close()
+    for client in clients:
+      await client.wait_closed()
+    self.stations.clear()
+    if self.events.empty():
+      self.events.put_nowait(None)
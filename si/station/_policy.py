@@ -0,0 +1,132 @@
+import collections as _collections_
+
+from si.protocol import ProtoChar as _ProtoChar_
+from si.protocol.extended import Cmd as _Cmd_
+from si.protocol.extended.command import \
+    get_sysdata as _get_sysdata_
+
+
+def _sysdata_payload(data):
+  # CN1 CN0 ADR and anz bytes of system data
+  return 3 + _get_sysdata_.codec.decode(data)['anz']
+#keep _get_sysdata_
+
+
+class RetryPolicy:
+  """
+  Timeouts and retry backoff of station requests
+
+  The timeout of a request is derived from the line speed and
+  the length of the request and of the expected response:
+
+    latency + margin * bits / baudrate
+
+  where bits is the count of the transmitted bits with 8N1
+  framing. Retries are delayed by an exponential backoff
+  bounded by max_backoff. The counters of the attempts are kept
+  in stats and per command in cmd_stats.
+
+  >>> from si.protocol.extended import Cmd
+  >>> policy = RetryPolicy()
+  >>> round(policy.timeout(Cmd.GET_TIME, b'', 38400), 3)
+  0.059
+  >>> data = b'\\x00\\x80'  # adr=0, anz=128
+  >>> round(policy.timeout(Cmd.GET_SYSDATA, data, 4800), 3)
+  0.509
+  """
+
+  latency = 0.05
+  "Seconds of station processing time allowed per request"
+
+  margin = 1.5
+  "Factor applied to the transmission time"
+
+  bits_per_byte = 10
+
+  backoff_base = 0.02
+  max_backoff = 0.5
+
+  default_payload = 128
+  "Assumed response data length of commands not listed"
+
+  # Response data length by command; integers or callables of
+  # the request data
+  response_payload = {
+      _Cmd_.GET_SYSDATA: _sysdata_payload,
+      _Cmd_.SET_SYSDATA: 3,
+      _Cmd_.GET_TIME: 9,
+      _Cmd_.SET_TIME: 9,
+      _Cmd_.GET_MS: 3,
+      _Cmd_.SET_MS: 3,
+      _Cmd_.SET_BAUD: 3,
+      _Cmd_.BEEP: 3,
+      _Cmd_.ERASE_B_DATA: 2,
+      _Cmd_.READ_BACKUP: 3 + 128,
+      _Cmd_.READ_CARDX_BLOCK: 3 + 128,
+      _Cmd_.CARD6_DATA: 3 + 128,
+      _Cmd_.CARD5_DATA: 2 + 128,
+  }
+
+  def __init__(self):
+    self.stats = _collections_.Counter()
+    self.cmd_stats = _collections_.defaultdict(
+        _collections_.Counter
+    )
+  #keep _collections_
+
+  @staticmethod
+  def request_length(data):
+    # WAKEUP STX STX CMD LEN (data) CRC1 CRC0 ETX
+    return 8 + len(data)
+
+  def response_length(self, cmd, data):
+    if isinstance(cmd, _ProtoChar_):
+      return 0
+    payload = self.response_payload.get(
+        cmd, self.default_payload
+    )
+    if callable(payload):
+      payload = payload(data)
+    # STX CMD LEN (data) CRC1 CRC0 ETX
+    return 6 + payload
+  #keep _ProtoChar_
+
+  def transfer_time(self, cmd, data, baudrate):
+    "Seconds needed to transmit the request and the response."
+    nbytes = self.request_length(data)
+    nbytes += self.response_length(cmd, data)
+    return nbytes * self.bits_per_byte / baudrate
+
+  def timeout(self, cmd, data, baudrate, *, ahead=0.0):
+    """
+    Return the seconds to wait for the response. ahead is the
+    transfer time of the requests queued before this one.
+    """
+    transfer_time = self.transfer_time(cmd, data, baudrate)
+    return self.latency + self.margin * (transfer_time + ahead)
+
+  def backoff(self, attempt):
+    "Return the seconds to wait before the attempt (from 1)."
+    if attempt <= 0:
+      return 0.0
+    return min(self.backoff_base * 2 ** (attempt - 1),
+        self.max_backoff)
+
+  def count(self, cmd, event):
+    """
+    Count an event of a request: 'request', 'attempt', 'retry',
+    'timeout', 'nak', 'success', 'failure' or 'stale' (a late
+    response dropped).
+    """
+    self.stats[event] += 1
+    self.cmd_stats[cmd.name][event] += 1
+
+  def export_stats(self):
+    "Return the statistics as a dict of plain dicts."
+    return {
+        'total': dict(self.stats),
+        'cmd': {
+            name: dict(counter)
+            for name, counter in self.cmd_stats.items()
+        },
+    }
@@ -0,0 +1,188 @@
+import asyncio as _asyncio_
+import os as _os_
+import termios as _termios_
+import tty as _tty_
+
+
+def configure(fd, baudrate, *, when=_termios_.TCSANOW):
+  "Set the serial device to raw 8N1 mode with baudrate."
+  speed = getattr(_termios_, f'B{baudrate}', None)
+  if speed is None:
+    raise ValueError(f'unsupported baudrate: {baudrate}')
+  _tty_.setraw(fd, when)
+  attrs = _termios_.tcgetattr(fd)
+  attrs[2] |= _termios_.CLOCAL | _termios_.CREAD
+  attrs[4] = attrs[5] = speed
+  _termios_.tcsetattr(fd, when, attrs)
+#keep _termios_
+#keep _tty_
+
+
+class SerialTransport(_asyncio_.Transport):
+  """
+  Transport over a serial device file descriptor
+
+  It works with any terminal device like USB serial adapters
+  and Linux pseudo terminals. Reads and writes are done with
+  the loop's add_reader() and add_writer() so no threads are
+  involved.
+
+  The traffic is recorded if capture is set to an object with
+  received(data) and sent(data) methods like
+  si.station.capture.CaptureWriter.port() returns.
+  """
+
+  max_size = 4096
+  capture = None
+
+  def __init__(self, loop, fd, protocol, baudrate,
+      waiter=None, extra=None):
+    super().__init__(extra)
+    self._loop = loop
+    self._fd = fd
+    self._protocol = protocol
+    self._baudrate = baudrate
+    self._buffer = bytearray()
+    self._closing = False
+    self._paused = False
+    loop.call_soon(protocol.connection_made, self)
+    loop.call_soon(loop.add_reader, fd, self._read_ready)
+    if waiter is not None:
+      loop.call_soon(waiter.set_result, None)
+
+  @property
+  def baudrate(self):
+    return self._baudrate
+
+  def set_baudrate(self, baudrate):
+    "Change the line speed after the pending output is sent."
+    configure(self._fd, baudrate, when=_termios_.TCSADRAIN)
+    self._baudrate = baudrate
+  #keep _termios_
+
+  def _read_ready(self):
+    try:
+      data = _os_.read(self._fd, self.max_size)
+    except (BlockingIOError, InterruptedError):
+      return
+    except OSError as exc:
+      # EIO is raised when the other end of a pty is closed
+      self._close(exc)
+      return
+    if data:
+      if self.capture is not None:
+        self.capture.received(data)
+      self._protocol.data_received(data)
+    else:
+      self._close(None)
+  #keep _os_
+
+  def write(self, data):
+    if self._closing:
+      raise ConnectionError('transport is closing')
+    if not data:
+      return
+    if self.capture is not None:
+      self.capture.sent(data)
+    if not self._buffer:
+      try:
+        n = _os_.write(self._fd, data)
+      except (BlockingIOError, InterruptedError):
+        n = 0
+      except OSError as exc:
+        self._close(exc)
+        return
+      if n == len(data):
+        return
+      data = memoryview(data)[n:]
+      self._loop.add_writer(self._fd, self._write_ready)
+    self._buffer += data
+  #keep _os_
+
+  def _write_ready(self):
+    try:
+      n = _os_.write(self._fd, self._buffer)
+    except (BlockingIOError, InterruptedError):
+      return
+    except OSError as exc:
+      self._buffer.clear()
+      self._loop.remove_writer(self._fd)
+      self._close(exc)
+      return
+    del self._buffer[:n]
+    if not self._buffer:
+      self._loop.remove_writer(self._fd)
+      if self._closing:
+        self._close(None)
+  #keep _os_
+
+  def get_write_buffer_size(self):
+    return len(self._buffer)
+
+  def is_closing(self):
+    return self._closing
+
+  def pause_reading(self):
+    if not self._paused and not self._closing:
+      self._loop.remove_reader(self._fd)
+      self._paused = True
+
+  def resume_reading(self):
+    if self._paused and not self._closing:
+      self._loop.add_reader(self._fd, self._read_ready)
+      self._paused = False
+
+  def is_reading(self):
+    return not (self._paused or self._closing)
+
+  def close(self):
+    if self._closing:
+      return
+    self._closing = True
+    self._loop.remove_reader(self._fd)
+    if not self._buffer:
+      self._close(None)
+
+  def abort(self):
+    self._buffer.clear()
+    self._close(None)
+
+  def _close(self, exc):
+    if self._fd is None:
+      return
+    self._closing = True
+    self._loop.remove_reader(self._fd)
+    self._loop.remove_writer(self._fd)
+    _os_.close(self._fd)
+    self._fd = None
+    self._loop.call_soon(self._protocol.connection_lost, exc)
+  #keep _os_
+
+
+async def open_serial(protocol_factory, path, baudrate=38400):
+  """
+  Open the serial device at path and connect it to a protocol
+
+  Like loop.create_connection() it returns a (transport,
+  protocol) pair.
+  """
+  loop = _asyncio_.get_running_loop()
+  fd = _os_.open(path,
+      _os_.O_RDWR | _os_.O_NOCTTY | _os_.O_NONBLOCK)
+  try:
+    configure(fd, baudrate)
+    protocol = protocol_factory()
+  except BaseException:
+    _os_.close(fd)
+    raise
+  waiter = loop.create_future()
+  transport = SerialTransport(loop, fd, protocol, baudrate,
+      waiter=waiter, extra={'path': path})
+  try:
+    await waiter
+  except BaseException:
+    transport.abort()
+    raise
+  return transport, protocol
+#keep _asyncio_
+#keep _os_
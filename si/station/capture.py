@@ -0,0 +1,331 @@
+"""
+Binary capture of serial traffic
+
+A capture file starts with an 8 bytes header (MAGIC and VERSION)
+followed by records of a 16 bytes little-endian header
+
+  timestamp  u64  nanoseconds since the epoch of the chunk
+  port       u16  port number given by the writer
+  direction  u8   Direction
+  (pad)      u8
+  length     u32  length of data
+
+and the raw bytes of the chunk. The sidecar index file (path +
+'.idx') holds (timestamp, offset) u64 pairs of every record
+starting after index_interval bytes since the previous entry so
+a reader can seek by time without scanning the capture.
+
+The timestamps of a writer come from time.monotonic_ns() offset
+to the wall clock when the writer is opened, but never earlier
+than the last record of the appended capture, so the records and
+the index stay ordered across sessions and reboots. Version 1
+captures have time.monotonic_ns() timestamps; they can be read
+but not appended to.
+"""
+
+import bisect as _bisect_
+import collections as _collections_
+import enum as _enum_
+import mmap as _mmap_
+import os as _os_
+import struct as _struct_
+import time as _time_
+
+from si.protocol import StreamParser as _StreamParser_
+
+
+MAGIC = b'SICAP'
+VERSION = 2
+_HEADER = _struct_.Struct('<5sB2x')
+_RECORD = _struct_.Struct('<QHBxI')
+_INDEX = _struct_.Struct('<QQ')
+
+
+class Direction(_enum_.IntEnum):
+  RX = 0
+  "Received from the station"
+  TX = 1
+  "Sent to the station"
+
+
+Record = _collections_.namedtuple(
+    'Record', ('timestamp', 'port', 'direction', 'data')
+)
+
+
+class CaptureWriter:
+  """
+  Appending writer of a capture file and its index
+
+  Records are collected in memory and written in batches of at
+  least batch_size bytes. An existing capture is appended to
+  after its last record is dropped if it is truncated.
+
+  >>> import tempfile, os
+  >>> path = os.path.join(tempfile.mkdtemp(), 'test.sicap')
+  >>> with CaptureWriter(path) as writer:
+  ...   writer.record(1, Direction.TX, b'\\xFF\\x02\\x02', 100)
+  ...   writer.record(1, Direction.RX, b'\\x02', 200)
+  >>> with CaptureReader(path) as reader:
+  ...   [(r.timestamp, bytes(r.data)) for r in reader]
+  [(100, b'\\xff\\x02\\x02'), (200, b'\\x02')]
+  """
+
+  batch_size = 1 << 16
+  index_interval = 1 << 20
+
+  def __init__(self, path):
+    self.path = path
+    last = 0
+    if _os_.path.exists(path) and _os_.path.getsize(path):
+      with CaptureReader(path) as reader:
+        if reader.version != VERSION:
+          raise ValueError(f'cannot append to a version'
+              f' {reader.version} capture: {path}')
+        last, end = reader._tail()
+        size = reader.size
+        nindex = _bisect_.bisect_left(reader._index_offsets, end)
+      # a record truncated by a crash is dropped with its index
+      # entry so the appended records are not read as its data
+      if end < size:
+        _os_.truncate(path, end)
+      if _os_.path.exists(path + '.idx'):
+        _os_.truncate(path + '.idx', nindex * _INDEX.size)
+    self._file = open(path, 'ab')
+    self._index = open(path + '.idx', 'ab')
+    self._offset = self._file.tell()
+    if not self._offset:
+      self._file.write(_HEADER.pack(MAGIC, VERSION))
+      self._offset = _HEADER.size
+    self._clock = (max(_time_.time_ns(), last)
+        - _time_.monotonic_ns())
+    self._buffer = bytearray()
+    self._indexbuffer = bytearray()
+    self._last_indexed = None
+    self._last_index_timestamp = last
+  #keep _bisect_
+  #keep _HEADER
+  #keep _INDEX
+  #keep _os_
+  #keep _time_
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+  def record(self, port, direction, data, timestamp=None):
+    "Add a chunk of data of port transmitted in direction."
+    if timestamp is None:
+      timestamp = self._clock + _time_.monotonic_ns()
+    offset = self._offset + len(self._buffer)
+    if ((self._last_indexed is None
+        or self.index_interval <= offset - self._last_indexed)
+        and self._last_index_timestamp <= timestamp):
+      # the index is kept ordered even if the given timestamps
+      # are not
+      self._indexbuffer += _INDEX.pack(timestamp, offset)
+      self._last_indexed = offset
+      self._last_index_timestamp = timestamp
+    self._buffer += _RECORD.pack(
+        timestamp, port, direction, len(data)
+    )
+    self._buffer += data
+    if self.batch_size <= len(self._buffer):
+      self.flush()
+  #keep _INDEX
+  #keep _RECORD
+  #keep _time_
+
+  def port(self, port):
+    "Return a recorder of port to set as SerialTransport.capture."
+    return PortRecorder(self, port)
+
+  def flush(self):
+    "Write the collected records."
+    if self._buffer:
+      self._file.write(self._buffer)
+      self._offset += len(self._buffer)
+      self._buffer.clear()
+      self._file.flush()
+    if self._indexbuffer:
+      self._index.write(self._indexbuffer)
+      self._indexbuffer.clear()
+      self._index.flush()
+
+  def close(self):
+    self.flush()
+    self._file.close()
+    self._index.close()
+
+
+class PortRecorder:
+
+  __slots__ = ('writer', 'port')
+
+  def __init__(self, writer, port):
+    self.writer = writer
+    self.port = port
+
+  def received(self, data):
+    self.writer.record(self.port, Direction.RX, data)
+
+  def sent(self, data):
+    self.writer.record(self.port, Direction.TX, data)
+
+
+class CaptureReader:
+  """
+  Memory mapped reader of a capture file
+
+  Opening maps the capture and loads only the index so it does
+  not depend on the capture size (the size attribute, in
+  bytes). Records are iterated with their data as memoryviews
+  of the map.
+  """
+
+  def __init__(self, path):
+    self.path = path
+    with open(path, 'rb') as f:
+      size = _os_.fstat(f.fileno()).st_size
+      self._map = _mmap_.mmap(f.fileno(), size,
+          access=_mmap_.ACCESS_READ)
+    self._view = memoryview(self._map)
+    self.size = size
+    magic, self.version = _HEADER.unpack_from(self._view)
+    if magic != MAGIC or self.version not in (1, VERSION):
+      self.close()
+      raise ValueError(f'not a capture file: {path}')
+    try:
+      with open(path + '.idx', 'rb') as f:
+        index = f.read()
+    except FileNotFoundError:
+      index = b''
+    # incomplete trailing entries are ignored
+    index = index[:len(index) - len(index) % _INDEX.size]
+    entries = list(_INDEX.iter_unpack(index))
+    self._index_timestamps = [e[0] for e in entries]
+    self._index_offsets = [e[1] for e in entries]
+  #keep _HEADER
+  #keep _INDEX
+  #keep _mmap_
+  #keep _os_
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+  def __iter__(self):
+    return self.records()
+
+  def close(self):
+    self._view.release()
+    try:
+      self._map.close()
+    except BufferError:
+      # record data still referenced keeps the map open until
+      # it is garbage collected
+      pass
+
+  def offset_of(self, timestamp):
+    "Return an offset of a record not after timestamp."
+    i = _bisect_.bisect_right(self._index_timestamps, timestamp)
+    if i:
+      return self._index_offsets[i - 1]
+    return _HEADER.size
+  #keep _bisect_
+  #keep _HEADER
+
+  def last_timestamp(self):
+    "Return the timestamp of the last record or 0."
+    return self._tail()[0]
+
+  def _tail(self):
+    # Scan the records from the last index entry and return the
+    # greatest timestamp and the end of the last complete record.
+    view = self._view
+    size = len(view)
+    unpack_from = _RECORD.unpack_from
+    hsize = _RECORD.size
+    i = _bisect_.bisect_right(self._index_offsets, size - hsize)
+    offset = (self._index_offsets[i - 1] if i else _HEADER.size)
+    last = 0
+    while offset + hsize <= size:
+      timestamp, _, _, length = unpack_from(view, offset)
+      if size < offset + hsize + length:
+        break
+      last = max(last, timestamp)
+      offset += hsize + length
+    return last, offset
+  #keep _bisect_
+  #keep _HEADER
+  #keep _RECORD
+
+  def records(self, start=None, end=None, *, port=None,
+      direction=None):
+    """
+    Iterate the records from start to end (timestamps) filtered
+    by port and direction. A truncated last record is ignored.
+    """
+    view = self._view
+    size = len(view)
+    unpack_from = _RECORD.unpack_from
+    hsize = _RECORD.size
+    offset = (_HEADER.size if start is None
+        else self.offset_of(start))
+    while offset + hsize <= size:
+      timestamp, port_, direction_, length = unpack_from(
+          view, offset
+      )
+      i = offset + hsize
+      offset = i + length
+      if size < offset:
+        break
+      if start is not None and timestamp < start:
+        continue
+      if end is not None and end < timestamp:
+        break
+      if port is not None and port != port_:
+        continue
+      if direction is not None and direction != direction_:
+        continue
+      yield Record(timestamp, port_, direction_, view[i:offset])
+  #keep _HEADER
+  #keep _RECORD
+
+  def replay(self, parser_factory=_StreamParser_, *, start=None,
+      end=None, port=None, direction=Direction.RX,
+      realtime=False, speed=1.0):
+    """
+    Feed the records to a parser per port and yield
+    (timestamp, port, frame) of the parsed instructions
+
+    By default the received bytes are parsed as fast as
+    possible. With realtime the records are fed at their
+    original pace (speed times faster).
+    """
+    parsers = {}
+    t0 = c0 = None
+    for record in self.records(start, end, port=port,
+        direction=direction):
+      if realtime:
+        if t0 is None:
+          t0, c0 = record.timestamp, _time_.monotonic_ns()
+        delay = ((record.timestamp - t0) / speed
+            - (_time_.monotonic_ns() - c0))
+        if 0 < delay:
+          _time_.sleep(delay / 1e9)
+      parser = parsers.get(record.port)
+      if parser is None:
+        parser = parsers[record.port] = parser_factory()
+      try:
+        frames = parser.feed(record.data)
+      except ValueError as e:
+        frames = e.frames
+      for frame in frames:
+        yield record.timestamp, record.port, frame
+  #keep _StreamParser_
+  #keep _time_
@@ -0,0 +1,293 @@
+"""
+Synthetic event day load on simulated stations
+
+A Scenario is a deterministic (seeded) timeline of punches and
+card readouts of generated cards. run() replays it on
+VirtualStations connected to a StationManager reading the cards
+and reports the achieved frames per second.
+
+  python -m si.station.loadgen --runners 2000 --controls 10 \\
+      --radio 5 --resends 2 --finish-rate 300 --seed 1
+"""
+
+import asyncio as _asyncio_
+import collections as _collections_
+import random as _random_
+import time as _time_
+
+from si import common as _common_
+from si import siid as _siid_
+from si.station import EventKind as _EventKind_
+from si.station import StationManager as _StationManager_
+from si.station import simulator as _simulator_
+
+
+DEFAULT_CARD_MIX = {
+    _common_.CardType.ActiveCard: 0.25,
+    _common_.CardType.Card8: 0.2,
+    _common_.CardType.Card9: 0.15,
+    _common_.CardType.Card10: 0.15,
+    _common_.CardType.Card11: 0.05,
+    _common_.CardType.Card6: 0.05,
+    _common_.CardType.Card5: 0.1,
+    _common_.CardType.PCard: 0.05,
+}
+"Share of card types"
+
+
+LoadEvent = _collections_.namedtuple(
+    'LoadEvent', ('time', 'station', 'kind', 'siid')
+)
+"A 'punch' or 'readout' of a card at a station index"
+
+
+LoadReport = _collections_.namedtuple(
+    'LoadReport', (
+        'events', 'frames_sent', 'frames_received', 'elapsed',
+        'fps',
+    )
+)
+
+
+class Scenario:
+  """
+  Timeline of punches and readouts
+
+  Card numbers are drawn from siid.CARD_TYPE_RANGES by the
+  card_mix weights of card types. Everything is drawn from a
+  random generator seeded by seed so the same calls build the
+  same timeline.
+
+  >>> scenario = Scenario(seed=1)
+  >>> cards = scenario.cards(3)
+  >>> scenario.finish_burst(cards, rate=300)
+  >>> [e.kind for e in scenario.timeline()]
+  ['readout', 'readout', 'readout']
+  >>> Scenario(seed=1).cards(3) == cards
+  True
+  """
+
+  def __init__(self, *, seed=0, card_mix=None):
+    self.seed = seed
+    self.random = _random_.Random(seed)
+    if card_mix is None:
+      card_mix = DEFAULT_CARD_MIX
+    self.card_mix = dict(card_mix)
+    self.nstations = 0
+    self.events = []
+    self._used = set()
+  #keep _random_
+
+  def add_stations(self, n=1):
+    "Add n stations and return their indexes."
+    first = self.nstations
+    self.nstations += n
+    return list(range(first, self.nstations))
+
+  def card_number(self, cardtype):
+    "Draw a not yet used card number of the card type."
+    ranges = _siid_.get_siid_ranges(cardtype)
+    weights = [last - first + 1 for first, last in ranges]
+    while True:
+      first, last = self.random.choices(ranges, weights)[0]
+      siid = self.random.randint(first, last)
+      if siid not in self._used:
+        self._used.add(siid)
+        return siid
+  #keep _siid_
+
+  def cards(self, n):
+    "Draw n card numbers by the card mix."
+    cardtypes = self.random.choices(
+        list(self.card_mix), list(self.card_mix.values()), k=n
+    )
+    return [self.card_number(t) for t in cardtypes]
+
+  def chasing_start(self, cards, controls, *, start=0.0,
+      start_spread=1800.0, leg_time=(60.0, 300.0), radio=(),
+      resends=0, resend_delay=(1.0, 5.0), readout=True):
+    """
+    Add a course of controls stations run by cards
+
+    Runners start within start_spread seconds after start and
+    punch each control after leg_time seconds scaled by their
+    own speed. Radio controls (indexes of the course) send each
+    punch resends more times after resend_delay. Finished cards
+    are read out on a further station if readout is true.
+    """
+    stations = self.add_stations(controls + bool(readout))
+    rnd = self.random
+    radio = set(radio)
+    for siid in cards:
+      t = start + rnd.uniform(0.0, start_spread)
+      pace = rnd.uniform(0.8, 1.25)
+      for k in range(controls):
+        t += rnd.uniform(*leg_time) * pace
+        self.events.append(
+            LoadEvent(t, stations[k], 'punch', siid)
+        )
+        if k in radio:
+          resend_t = t
+          for _ in range(resends):
+            resend_t += rnd.uniform(*resend_delay)
+            self.events.append(
+                LoadEvent(resend_t, stations[k], 'punch', siid)
+            )
+      if readout:
+        t += rnd.uniform(*leg_time) * pace
+        self.events.append(
+            LoadEvent(t, stations[-1], 'readout', siid)
+        )
+
+  def finish_burst(self, cards, rate, *, start=0.0, stations=1):
+    """
+    Add readouts of cards arriving at rate per minute (Poisson)
+    on a number of readout stations.
+    """
+    indexes = self.add_stations(stations)
+    t = start
+    for i, siid in enumerate(cards):
+      t += self.random.expovariate(rate / 60.0)
+      station = indexes[i % len(indexes)]
+      self.events.append(LoadEvent(t, station, 'readout', siid))
+
+  def timeline(self):
+    "Return the events in time order."
+    return sorted(self.events)
+
+
+async def run(scenario, *, speed=None, pace=False,
+    baudrate=38400, settle=5.0):
+  """
+  Replay scenario on simulated stations and return a LoadReport
+
+  With speed the timeline is played speed times faster than real
+  time, without it as fast as possible. pace and baudrate are
+  passed to the VirtualStations. A readout sends a card
+  insertion frame, the manager reads the blocks of the card and
+  a removal frame is sent when they are received (or after
+  settle seconds). The readouts of a station are done one after
+  the other.
+  """
+  stations = [
+      _simulator_.VirtualStation(code=i + 1, pace=pace,
+          baudrate=baudrate, seed=scenario.seed + i)
+      for i in range(scenario.nstations)
+  ]
+  manager = _StationManager_(readout=True)
+  received = 0
+  sent = 0
+  writing_done = False
+  done = _asyncio_.Event()
+  # serial number: [blocks left, future] of the card being read
+  reading = {}
+  try:
+    for i, station in enumerate(stations):
+      station.station.sysdata['SerialNumber'] = 100001 + i
+      await manager.add(await station.start(), baudrate)
+    lines = [_asyncio_.Lock() for _ in stations]
+
+    async def consume():
+      nonlocal received
+      async for event in manager:
+        received += 1
+        card = reading.get(event.serial_number)
+        if card is not None and event.kind is _EventKind_.Readout:
+          card[0] -= 1
+          if not card[0]:
+            card[1].set_result(None)
+        if received == sent and writing_done:
+          done.set()
+
+    async def readout(i, siid):
+      nonlocal sent
+      serial_number = 100001 + i
+      station = stations[i]
+      async with lines[i]:
+        nblocks = len(
+            manager[serial_number].readout_requests(siid)
+        )
+        sent += 2 + nblocks
+        future = _asyncio_.get_running_loop().create_future()
+        reading[serial_number] = [nblocks, future]
+        await station.insert_card(siid)
+        try:
+          await _asyncio_.wait_for(future, settle)
+        except _asyncio_.TimeoutError:
+          pass
+        del reading[serial_number]
+        await station.remove_card()
+
+    consumer = _asyncio_.ensure_future(consume())
+    timeline = scenario.timeline()
+    writes = []
+    t0 = _time_.perf_counter()
+    loop = _asyncio_.get_running_loop()
+    l0 = loop.time()
+    for i, event in enumerate(timeline):
+      if speed:
+        delay = l0 + event.time / speed - loop.time()
+        if 0 < delay:
+          await _asyncio_.sleep(delay)
+      elif not i % 256:
+        await _asyncio_.sleep(0)
+      if event.kind == 'punch':
+        writes.append(stations[event.station].punch(event.siid))
+        sent += 1
+      else:
+        writes.append(_asyncio_.ensure_future(
+            readout(event.station, event.siid)
+        ))
+    await _asyncio_.gather(*writes)
+    writing_done = True
+    if received < sent:
+      try:
+        await _asyncio_.wait_for(done.wait(), settle)
+      except _asyncio_.TimeoutError:
+        pass
+    elapsed = _time_.perf_counter() - t0
+    consumer.cancel()
+  finally:
+    await manager.close()
+    for station in stations:
+      station.close()
+  return LoadReport(len(timeline), sent, received, elapsed,
+      received / elapsed)
+#keep _asyncio_
+#keep _EventKind_
+#keep _simulator_
+#keep _StationManager_
+#keep _time_
+
+
+def main(argv=None):
+  import argparse
+  parser = argparse.ArgumentParser(
+      description='Replay a synthetic event on simulated stations.'
+  )
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--runners', type=int, default=2000)
+  parser.add_argument('--controls', type=int, default=10)
+  parser.add_argument('--radio', type=int, nargs='*', default=[])
+  parser.add_argument('--resends', type=int, default=0)
+  parser.add_argument('--finish-rate', type=float, default=0.0,
+      help='readouts per minute of a separate finish burst')
+  parser.add_argument('--speed', type=float,
+      help='times real time; as fast as possible if not given')
+  args = parser.parse_args(argv)
+  scenario = Scenario(seed=args.seed)
+  cards = scenario.cards(args.runners)
+  scenario.chasing_start(cards, args.controls, radio=args.radio,
+      resends=args.resends)
+  if args.finish_rate:
+    scenario.finish_burst(scenario.cards(args.runners),
+        args.finish_rate)
+  report = _asyncio_.run(run(scenario, speed=args.speed))
+  print(f'{report.events} events, {report.frames_sent} frames'
+      f' sent, {report.frames_received} received'
+      f' in {report.elapsed:.2f} s: {report.fps:.0f} frames/s')
+#keep _asyncio_
+
+
+if __name__ == '__main__':
+  main()
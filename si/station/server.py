@@ -0,0 +1,293 @@
+"""
+Local server sharing the stations of one process
+
+A StationServer owns the serial ports through a StationManager and
+fans out every received frame to the subscribers connected to its
+TCP or Unix socket listeners. Each frame is encoded once per
+format, whatever the number of subscribers:
+
+  raw    the frames as sent by the station, to be read with a
+         si.protocol.StreamParser like a serial port
+  jsonl  one JSON object per line with the serial number of the
+         station, the receive time and the decoded event
+
+A listener may be bound to the serial number of one station to
+send only its frames. Raw listeners should be, as frames of
+different stations are not told apart in the raw stream.
+
+  python -m si.station.server /dev/ttyUSB0 /dev/ttyUSB1 \\
+      --tcp 127.0.0.1:10001,raw,123456 --unix /tmp/si.sock,jsonl
+"""
+
+import asyncio as _asyncio_
+import json as _json_
+import time as _time_
+
+from si.protocol import ProtoChar as _ProtoChar_
+from si.protocol.extended import \
+    ExtendedRawInstruction as _ExtendedRawInstruction_
+from si.protocol.legacy import \
+    LegacyRawInstruction as _LegacyRawInstruction_
+from si.station import StationManager as _StationManager_
+
+
+_CODECS = {
+    _ExtendedRawInstruction_.Parts: _ExtendedRawInstruction_,
+    _LegacyRawInstruction_.Parts: _LegacyRawInstruction_,
+}
+
+
+def encode_raw(event, time=None):
+  "Return the bytes of the frame of a StationEvent."
+  frame = event.event
+  if isinstance(frame, _ProtoChar_):
+    return bytes((frame.value,))
+  return _CODECS[type(frame)].encode(frame)
+#keep _CODECS
+#keep _ProtoChar_
+
+
+def encode_jsonl(event, time=None):
+  "Return a StationEvent as a JSON line."
+  frame = event.event
+  obj = {
+      'serial_number': event.serial_number,
+      'time': time,
+      'kind': event.kind.name,
+  }
+  if isinstance(frame, _ProtoChar_):
+    obj['char'] = frame.name
+  else:
+    obj['cmd'] = frame.cmd.name
+    obj['data'] = frame.data.hex()
+    obj['cn'] = event.cn
+    obj['siid'] = event.siid
+    if event.time is not None:
+      obj['punch_time'] = event.time.isoformat()
+  return (_json_.dumps(obj) + '\n').encode()
+#keep _json_
+#keep _ProtoChar_
+
+
+class Subscriber(_asyncio_.Protocol):
+  """
+  Connection of a subscriber of a StationServer
+
+  The frames are written to the transport without waiting. Once
+  more than max_buffer bytes wait to be sent, the frames for
+  this subscriber are dropped and counted in the dropped
+  attribute until its buffer drains below the half of it, or the
+  connection is aborted if overflow is 'close'. A slow
+  subscriber thus loses whole frames but never holds up the
+  stations or the other subscribers.
+  """
+
+  def __init__(self, server, format, serial_number=None):
+    self.server = server
+    self.format = format
+    self.serial_number = serial_number
+    self.transport = None
+    self.paused = False
+    self.sent = 0
+    self.dropped = 0
+
+  def __repr__(self):
+    peer = None
+    if self.transport is not None:
+      peer = self.transport.get_extra_info('peername')
+    return (f'<{self.__class__.__name__} {self.format} {peer!r}'
+        f' sent={self.sent} dropped={self.dropped}>')
+
+  def connection_made(self, transport):
+    self.transport = transport
+    max_buffer = self.server.max_buffer
+    transport.set_write_buffer_limits(
+        high=max_buffer, low=max_buffer // 2
+    )
+    self.server.subscribers.add(self)
+
+  def connection_lost(self, exc):
+    self.server.subscribers.discard(self)
+
+  def data_received(self, data):
+    pass
+
+  def eof_received(self):
+    return False
+
+  def pause_writing(self):
+    self.paused = True
+
+  def resume_writing(self):
+    self.paused = False
+
+  def write(self, data):
+    "Send data unless the buffer is full."
+    if self.paused:
+      self.dropped += 1
+      if self.server.overflow == 'close':
+        self.transport.abort()
+      return False
+    self.transport.write(data)
+    self.sent += 1
+    return True
+
+
+class StationServer:
+  """
+  Fan-out server of the frames received from the stations
+
+  The stations are added to the manager (created if not given)
+  and the frames not answering a request are published to all
+  subscribers as they are received by the serve() task.
+  Listeners are started with listen_tcp() and listen_unix(),
+  each with the format of its subscribers, a key of the formats
+  attribute, and optionally the serial number of the only
+  station to send the frames of.
+
+  The subscribers are bounded to max_buffer bytes of unsent data
+  each; see Subscriber for the overflow behavior.
+  """
+
+  formats = {
+      'raw': encode_raw,
+      'jsonl': encode_jsonl,
+  }
+
+  def __init__(self, manager=None, *, max_buffer=65536,
+      overflow='drop'):
+    if overflow not in ('drop', 'close'):
+      raise ValueError(f'invalid overflow: {overflow!r}')
+    if manager is None:
+      manager = _StationManager_()
+    self.manager = manager
+    self.max_buffer = max_buffer
+    self.overflow = overflow
+    self.subscribers = set()
+    self.servers = []
+    self.published = 0
+  #keep _StationManager_
+
+  async def _listen(self, start, format, serial_number, *args,
+      **kwargs):
+    if format not in self.formats:
+      raise ValueError(f'invalid format: {format!r}')
+    server = await start(
+        lambda: Subscriber(self, format, serial_number),
+        *args, **kwargs
+    )
+    self.servers.append(server)
+    return server
+
+  async def listen_tcp(self, host='127.0.0.1', port=0, *,
+      format='raw', serial_number=None, **kwargs):
+    "Start and return a TCP listener (an asyncio.Server)."
+    loop = _asyncio_.get_running_loop()
+    return await self._listen(loop.create_server, format,
+        serial_number, host, port, **kwargs)
+  #keep _asyncio_
+
+  async def listen_unix(self, path, *, format='raw',
+      serial_number=None, **kwargs):
+    "Start and return a Unix listener (an asyncio.Server)."
+    loop = _asyncio_.get_running_loop()
+    return await self._listen(loop.create_unix_server, format,
+        serial_number, path, **kwargs)
+  #keep _asyncio_
+
+  def publish(self, event, time=None):
+    "Send a StationEvent to all subscribers."
+    if time is None:
+      time = _time_.time()
+    encoded = {}
+    serial_number = event.serial_number
+    for subscriber in tuple(self.subscribers):
+      if subscriber.serial_number not in (None, serial_number):
+        continue
+      format = subscriber.format
+      data = encoded.get(format)
+      if data is None:
+        data = self.formats[format](event, time)
+        encoded[format] = data
+      subscriber.write(data)
+    self.published += 1
+  #keep _time_
+
+  async def serve(self):
+    "Publish the events of the manager until it is closed."
+    async for event in self.manager:
+      self.publish(event)
+
+  async def close(self):
+    "Stop the listeners, the subscribers and the stations."
+    for server in self.servers:
+      server.close()
+    for subscriber in tuple(self.subscribers):
+      subscriber.transport.close()
+    for server in self.servers:
+      await server.wait_closed()
+    self.servers.clear()
+    await self.manager.close()
+
+
+def _address(spec):
+  # ADDRESS[,FORMAT[,SERIAL_NUMBER]]
+  address, *options = spec.split(',', 2)
+  format = (options[0] if options else '') or 'raw'
+  serial_number = (int(options[1]) if options[1:] else None)
+  return address, {
+      'format': format,
+      'serial_number': serial_number,
+  }
+
+
+async def serve(paths, *, tcp=(), unix=(), **kwargs):
+  "Run a StationServer of the stations at paths until cancelled."
+  server = StationServer(**kwargs)
+  try:
+    for path, result in zip(paths,
+        await server.manager.add_many(paths)):
+      if isinstance(result, BaseException):
+        print(f'{path}: {result!r}', flush=True)
+      else:
+        print(f'{path}: {result}', flush=True)
+    for spec in tcp:
+      address, options = _address(spec)
+      host, _, port = address.rpartition(':')
+      await server.listen_tcp(host or '127.0.0.1', int(port),
+          **options)
+    for spec in unix:
+      path, options = _address(spec)
+      await server.listen_unix(path, **options)
+    await server.serve()
+  finally:
+    await server.close()
+
+
+def main(argv=None):
+  import argparse
+  parser = argparse.ArgumentParser(
+      description='Share SPORTident stations over local sockets.'
+  )
+  parser.add_argument('paths', nargs='+', metavar='PATH')
+  parser.add_argument('--tcp', action='append', default=[],
+      metavar='[HOST:]PORT[,FORMAT[,SERIAL_NUMBER]]')
+  parser.add_argument('--unix', action='append', default=[],
+      metavar='PATH[,FORMAT[,SERIAL_NUMBER]]')
+  parser.add_argument('--max-buffer', type=int, default=65536)
+  parser.add_argument('--overflow', default='drop',
+      choices=('drop', 'close'))
+  args = parser.parse_args(argv)
+  try:
+    _asyncio_.run(serve(**vars(args)))
+  except KeyboardInterrupt:
+    pass
+#keep _asyncio_
+
+
+del _ExtendedRawInstruction_
+del _LegacyRawInstruction_
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,375 @@
+"""
+Virtual station served over a Linux pseudo terminal
+
+Run it as a separate process to get a device path any client can
+open:
+
+  python -m si.station.simulator --serial-number 123456
+"""
+
+import asyncio as _asyncio_
+import datetime as _datetime_
+import os as _os_
+import random as _random_
+import termios as _termios_
+import tty as _tty_
+
+from si import common as _common_
+from si import siid as _siid_
+from si.protocol import ProtoChar as _ProtoChar_
+from si.protocol.extended import \
+    Cmd as _Cmd_, \
+    ExtendedRawInstruction as _ExtendedRawInstruction_, \
+    ExtendedStreamParser as _ExtendedStreamParser_
+from si.protocol.extended.response import \
+    get_sysdata as _get_sysdata_response_
+from si.product import bs as _bs_
+from si.station import SerialTransport as _SerialTransport_
+
+
+_CARD_IN_CMDS = {
+    _common_.CardType.Card5: _Cmd_.CARD5_IN,
+    _common_.CardType.Card_5U: _Cmd_.CARD5_IN,
+    _common_.CardType.Card_5R: _Cmd_.CARD5_IN,
+    _common_.CardType.Card6: _Cmd_.CARD6_IN,
+}
+
+_SPEEDS = {
+    getattr(_termios_, f'B{b}'): b for b in (4800, 38400)
+}
+
+
+class VirtualStation(_asyncio_.Protocol):
+  """
+  Extended protocol station simulated over a pseudo terminal
+
+  Requests are answered from the memory of a BaseStation one
+  after the other like a real station does. The served commands
+  are GET_SYSDATA, SET_SYSDATA, READ_BACKUP, GET_TIME, SET_BAUD,
+  BEEP and the card reading CARD5_DATA, CARD6_DATA and
+  READ_CARDX_BLOCK; others are NAKed. insert_card(),
+  remove_card() and punch() send the events. An inserted card
+  has random memory drawn from the seeded generator which is
+  read until the card is removed.
+
+  Output is paced to baudrate (unless pace is false) and
+  requests sent on a different line speed than the simulated
+  one are ignored, like garbage would be. Each request gets
+  answered after latency seconds and it is NAKed, dropped or
+  answered with a corrupted byte with nak_rate, drop_rate and
+  corrupt_rate probabilities, drawn from a seeded random
+  generator.
+  """
+
+  def __init__(self, station=None, *, code=1, baudrate=38400,
+      latency=0.0, nak_rate=0.0, drop_rate=0.0,
+      corrupt_rate=0.0, seed=None, pace=True):
+    if station is None:
+      station = _bs_.BaseStation()
+    self.station = station
+    self.code = code
+    self.baudrate = baudrate
+    self.latency = latency
+    self.nak_rate = nak_rate
+    self.drop_rate = drop_rate
+    self.corrupt_rate = corrupt_rate
+    self.pace = pace
+    self.random = _random_.Random(seed)
+    self.parser = _ExtendedStreamParser_(resync=True)
+    self.served = 0
+    self.backup_pointer = station.START_ADR
+    self.card = None
+    self.transport = None
+    self.path = None
+    self._master = None
+    self._slave = None
+    self._requests = None
+    self._server = None
+    self._line = None
+  #keep _bs_
+  #keep _ExtendedStreamParser_
+  #keep _random_
+
+  async def start(self):
+    "Open the pseudo terminal and return the device path."
+    loop = _asyncio_.get_running_loop()
+    self._master, self._slave = _os_.openpty()
+    _tty_.setraw(self._master)
+    _tty_.setraw(self._slave)
+    _os_.set_blocking(self._master, False)
+    self.path = _os_.ttyname(self._slave)
+    self._requests = _asyncio_.Queue()
+    self._line = _asyncio_.Lock()
+    self._server = loop.create_task(self._serve())
+    # the slave end is kept open so the master does not get EIO
+    # when clients close the device
+    _SerialTransport_(loop, self._master, self, self.baudrate)
+    await _asyncio_.sleep(0)
+    return self.path
+  #keep _os_
+  #keep _SerialTransport_
+  #keep _tty_
+
+  def close(self):
+    if self._server is not None:
+      self._server.cancel()
+    if self.transport is not None:
+      self.transport.close()
+    if self._slave is not None:
+      _os_.close(self._slave)
+      self._slave = None
+  #keep _os_
+
+  def connection_made(self, transport):
+    self.transport = transport
+
+  def connection_lost(self, exc):
+    self.transport = None
+
+  def line_baudrate(self):
+    "Return the line speed set by the client."
+    speed = _termios_.tcgetattr(self._master)[4]
+    return _SPEEDS.get(speed)
+  #keep _SPEEDS
+  #keep _termios_
+
+  def data_received(self, data):
+    if self.line_baudrate() != self.baudrate:
+      return
+    for frame in self.parser.feed(data):
+      self._requests.put_nowait(frame)
+
+  async def _serve(self):
+    while True:
+      frame = await self._requests.get()
+      if self.latency:
+        await _asyncio_.sleep(self.latency)
+      rnd = self.random.random()
+      if rnd < self.drop_rate:
+        continue
+      rnd -= self.drop_rate
+      if rnd < self.nak_rate:
+        await self.write(bytes((_ProtoChar_.NAK.value,)))
+        continue
+      rnd -= self.nak_rate
+      response = self.handle(frame)
+      self.served += 1
+      if response is None:
+        await self.write(bytes((_ProtoChar_.NAK.value,)))
+        continue
+      cmd, data, after = response
+      encoded = self.encode(cmd, data)
+      if rnd < self.corrupt_rate:
+        encoded = bytearray(encoded)
+        i = self.random.randrange(2, len(encoded) - 1)
+        encoded[i] ^= 0xFF
+      await self.write(encoded)
+      if after is not None:
+        after()
+  #keep _asyncio_
+  #keep _ProtoChar_
+
+  def encode(self, cmd, data):
+    raw = _ExtendedRawInstruction_
+    return raw.encode(raw.make_obj(cmd, data, wakeup=0))
+  #keep _ExtendedRawInstruction_
+
+  async def write(self, data):
+    "Send data paced to the simulated line speed."
+    async with self._line:
+      if self.pace:
+        await _asyncio_.sleep(len(data) * 10 / self.baudrate)
+      if self.transport is not None:
+        self.transport.write(data)
+  #keep _asyncio_
+
+  def handle(self, frame):
+    """
+    Return the (cmd, data, after) response of the request frame
+    or None to NAK it. after is None or a callable to be called
+    when the response is sent.
+    """
+    handler = getattr(self, f'handle_{frame.cmd.name}', None)
+    if handler is None:
+      return None
+    try:
+      return handler(frame.data)
+    except (AssertionError, IndexError, ValueError):
+      return None
+
+  @property
+  def _cn(self):
+    return self.code.to_bytes(2, 'big')
+
+  def handle_GET_SYSDATA(self, data):
+    adr, anz = data
+    assert adr + anz <= 128
+    sysdata = bytes(self.station.sysdata[adr:adr+anz])
+    return _Cmd_.GET_SYSDATA, _get_sysdata_response_.codec.encode(
+        self.code, adr, sysdata
+    ), None
+  #keep _Cmd_
+  #keep _get_sysdata_response_
+
+  def handle_SET_SYSDATA(self, data):
+    adr = data[0]
+    values = data[1:]
+    assert adr + len(values) <= 128
+    self.station.sysdata[adr:adr+len(values)] = values
+    return _Cmd_.SET_SYSDATA, self._cn + bytes((adr,)), None
+  #keep _Cmd_
+
+  def handle_READ_BACKUP(self, data):
+    adr = int.from_bytes(data[0:3], 'big')
+    num = data[3]
+    assert adr + num <= len(self.station.memory.data)
+    block = bytes(self.station.memory[adr:adr+num])
+    return (_Cmd_.READ_BACKUP,
+        self._cn + bytes(data[0:3]) + block, None)
+  #keep _Cmd_
+
+  def handle_CARD5_DATA(self, data):
+    assert self.card is not None and not data
+    return _Cmd_.CARD5_DATA, self._cn + self.card[0:128], None
+  #keep _Cmd_
+
+  def _card_block(self, cmd, data):
+    block = data[0]
+    assert self.card is not None and len(data) == 1
+    assert (block + 1) * 128 <= len(self.card)
+    return (cmd, self._cn + bytes((block,))
+        + self.card[block*128:(block+1)*128], None)
+
+  def handle_CARD6_DATA(self, data):
+    return self._card_block(_Cmd_.CARD6_DATA, data)
+  #keep _Cmd_
+
+  def handle_READ_CARDX_BLOCK(self, data):
+    return self._card_block(_Cmd_.READ_CARDX_BLOCK, data)
+  #keep _Cmd_
+
+  def handle_GET_TIME(self, data):
+    assert not data
+    return _Cmd_.GET_TIME, self._cn + self.time_bytes(), None
+  #keep _Cmd_
+
+  def handle_BEEP(self, data):
+    return _Cmd_.BEEP, self._cn + bytes(data[0:1]), None
+  #keep _Cmd_
+
+  def handle_SET_BAUD(self, data):
+    baudrate = {0: 4800, 1: 38400}[data[0]]
+    # the response is sent on the old line speed
+    def after():
+      self.baudrate = baudrate
+    return _Cmd_.SET_BAUD, self._cn + bytes(data[0:1]), after
+  #keep _Cmd_
+
+  @staticmethod
+  def time_bytes(now=None):
+    "Return the YY MM DD PTD TH TL TSS bytes of now."
+    # References:
+    # PCPROG5 (p. 17)
+    if now is None:
+      now = _datetime_.datetime.now()
+    seconds = now.hour * 3600 + now.minute * 60 + now.second
+    pm, seconds = divmod(seconds, 12 * 3600)
+    dow = (now.weekday() + 1) % 7  # Sunday is 0
+    return bytes((
+        now.year % 100, now.month, now.day,
+        (dow << 1) | pm,
+        seconds >> 8, seconds & 0xFF,
+        now.microsecond * 256 // 1000000,
+    ))
+  #keep _datetime_
+
+  def insert_card(self, siid):
+    "Send the card insertion event of the card siid."
+    cardtype = _siid_.get_card_type_from_siid(siid)
+    cmd = _CARD_IN_CMDS.get(cardtype, _Cmd_.CARD_CARD_X_IN)
+    # SI-card 5 has one block, the others up to 8
+    size = (128 if cmd is _Cmd_.CARD5_IN else 1024)
+    self.card = self.random.getrandbits(size * 8).to_bytes(
+        size, 'little'
+    )
+    data = self._cn + _siid_.get_bytes_from_siid(siid)
+    return _asyncio_.ensure_future(
+        self.write(self.encode(cmd, data))
+    )
+  #keep _asyncio_
+  #keep _CARD_IN_CMDS
+  #keep _Cmd_
+  #keep _siid_
+
+  def remove_card(self):
+    "Send the card removal event."
+    self.card = None
+    data = self._cn + b'\x00\x00\x00\x00'
+    return _asyncio_.ensure_future(
+        self.write(self.encode(_Cmd_.CARD_OUT, data))
+    )
+  #keep _asyncio_
+  #keep _Cmd_
+
+  def punch(self, siid, now=None):
+    "Send the autosend punch record of the card siid."
+    # References:
+    # PCPROG5
+    # D3 0D CN1 CN0 SI3 SI2 SI1 SI0 TD TH TL TSS MEM2 MEM1 MEM0
+    pointer = self.backup_pointer
+    self.backup_pointer += 8
+    data = b''.join((
+        self._cn,
+        _siid_.get_bytes_from_siid(siid),
+        self.time_bytes(now)[3:],
+        pointer.to_bytes(3, 'big'),
+    ))
+    return _asyncio_.ensure_future(
+        self.write(self.encode(_Cmd_.PUNCH_TRIGGER, data))
+    )
+  #keep _asyncio_
+  #keep _Cmd_
+  #keep _siid_
+
+
+async def serve(**kwargs):
+  "Run a VirtualStation until cancelled."
+  serial_number = kwargs.pop('serial_number', None)
+  station = VirtualStation(**kwargs)
+  if serial_number is not None:
+    station.station.sysdata['SerialNumber'] = serial_number
+  path = await station.start()
+  print(path, flush=True)
+  try:
+    await _asyncio_.Event().wait()
+  finally:
+    station.close()
+#keep _asyncio_
+
+
+def main(argv=None):
+  import argparse
+  parser = argparse.ArgumentParser(
+      description='Serve a virtual SPORTident station on a pty.'
+  )
+  parser.add_argument('--serial-number', type=int)
+  parser.add_argument('--code', type=int, default=1)
+  parser.add_argument('--baudrate', type=int, default=38400,
+      choices=(4800, 38400))
+  parser.add_argument('--latency', type=float, default=0.0)
+  parser.add_argument('--nak-rate', type=float, default=0.0)
+  parser.add_argument('--drop-rate', type=float, default=0.0)
+  parser.add_argument('--corrupt-rate', type=float, default=0.0)
+  parser.add_argument('--seed', type=int)
+  parser.add_argument('--no-pace', dest='pace',
+      action='store_false')
+  args = parser.parse_args(argv)
+  try:
+    _asyncio_.run(serve(**vars(args)))
+  except KeyboardInterrupt:
+    pass
+#keep _asyncio_
+
+
+if __name__ == '__main__':
+  main()
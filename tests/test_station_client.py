@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from si import exc
+from si.protocol import Mode
+from si.protocol.extended import Cmd
+from si.protocol.extended.response import get_sysdata
+from si.station import StationClient
+from si.station.simulator import VirtualStation
+
+
+def run(coro):
+  return asyncio.run(asyncio.wait_for(coro, 60))
+
+
+async def connect(**kwargs):
+  station = VirtualStation(pace=False, seed=1, **kwargs)
+  station.station.sysdata[:] = bytes(range(128))
+  client = await StationClient.open(await station.start())
+  return station, client
+
+
+def check(adr, frame):
+  response = get_sysdata.codec.decode(frame.data)
+  assert response['adr'] == adr
+  assert response['data'] == bytes(range(adr, adr + 8))
+
+
+@pytest.mark.parametrize('errors', [
+    {'drop_rate': 0.2},
+    {'nak_rate': 0.2},
+    {'corrupt_rate': 0.2},
+    {'drop_rate': 0.1, 'nak_rate': 0.1, 'corrupt_rate': 0.1},
+])
+@pytest.mark.parametrize('pipelined', [False, True])
+def test_responses_belong_to_their_requests(errors, pipelined):
+  async def main():
+    station, client = await connect(**errors)
+    adrs = [i % 120 for i in range(200)]
+    try:
+      if pipelined:
+        results = await asyncio.gather(*(
+            client.get_sysdata(adr, 8, retries=3) for adr in adrs
+        ), return_exceptions=True)
+      else:
+        results = []
+        for adr in adrs:
+          try:
+            results.append(await client.get_sysdata(adr, 8,
+                retries=3))
+          except (asyncio.TimeoutError, exc.NAKError) as e:
+            results.append(e)
+    finally:
+      client.close()
+      station.close()
+    failed = 0
+    for adr, result in zip(adrs, results):
+      if isinstance(result,
+          (asyncio.TimeoutError, exc.NAKError)):
+        failed += 1
+      else:
+        check(adr, result)
+    assert failed < len(adrs) // 20
+  run(main())
+
+
+def test_late_responses_are_dropped():
+  async def main():
+    # each response arrives after its request timed out
+    station, client = await connect(latency=0.03)
+    client.timeout = 0.02
+    try:
+      for adr in range(0, 80, 8):
+        try:
+          frame = await client.get_sysdata(adr, 8, retries=0)
+        except asyncio.TimeoutError:
+          await asyncio.sleep(0.001)
+        else:
+          check(adr, frame)
+      await asyncio.sleep(0.1)
+      for adr in range(0, 80, 8):
+        check(adr, await client.get_sysdata(adr, 8,
+            timeout=1))
+    finally:
+      client.close()
+      station.close()
+    assert client.policy.stats['stale']
+  run(main())
+
+
+def test_nak_fails_oldest_request():
+  async def main():
+    station, client = await connect(nak_rate=1.0)
+    try:
+      with pytest.raises(exc.NAKError):
+        await client.request(Cmd.GET_TIME, retries=1)
+    finally:
+      client.close()
+      station.close()
+    stats = client.policy.stats
+    assert (stats['nak'], stats['retry']) == (2, 1)
+  run(main())
+
+
+def test_frame_after_noise_is_not_held_back():
+  client = StationClient(mode=Mode.Legacy)
+  frames = []
+  client.frame_received = frames.append
+  client.data_received(b'\x00\x02\x31\x41\x03')
+  assert [frame.data for frame in frames] == [b'A']
+
+
+@pytest.mark.parametrize('siid, blocks', [
+    (12345, None),
+    (600001, (0, 6, 7)),
+    (8000001, (0, 4, 5, 6, 7)),
+])
+def test_read_card_blocks(siid, blocks):
+  async def main():
+    station, client = await connect()
+    try:
+      await station.insert_card(siid)
+      frames = await client.read_card(siid)
+    finally:
+      client.close()
+      station.close()
+    if blocks is None:
+      assert [frame.data[2:] for frame in frames] == [
+          station.card[0:128]
+      ]
+    else:
+      assert [frame.data[2:] for frame in frames] == [
+          bytes((b,)) + station.card[b*128:(b+1)*128]
+          for b in blocks
+      ]
+  run(main())